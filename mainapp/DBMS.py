@@ -1,14 +1,201 @@
+import atexit
+import os
 import sqlite3
-from typing import List, Tuple
+import threading
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator, List, Tuple
 
-class ChatDatabase:
+
+def _configure_connection(connection, busy_timeout=5000):
+    """
+    Apply the pragmas shared by every database connection.
+    WAL lets readers run during a write, busy_timeout makes writers wait for the lock instead of
+    failing with "database is locked", and synchronous=NORMAL only fsyncs at checkpoints.
+    """
+    connection.execute(f"PRAGMA busy_timeout={int(busy_timeout)}")
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA cache_size=-20000")  # about 20 MB
+    connection.execute("PRAGMA temp_store=MEMORY")
+
+
+def _column_names(connection, table):
+    return [row[1] for row in connection.execute(f"PRAGMA table_info({table})")]
+
+
+def _table_exists(connection, name):
+    return connection.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone() is not None
+
+
+PUBLISHED_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# SQLite GLOB matching values already stored in PUBLISHED_FORMAT
+_PUBLISHED_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]T[0-9][0-9]:[0-9][0-9]:[0-9][0-9]Z"
+
+
+def normalize_published(value):
+    """
+    Convert a publication date (ISO 8601, RSS/RFC 822, date or datetime) to sortable UTC text
+    ("YYYY-MM-DDTHH:MM:SSZ"; plain dates become midnight UTC).
+    :return: The converted text, or None if the value is not a recognisable date.
+    """
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime(value.year, value.month, value.day)
+    elif value is None:
+        return None
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(text)
+            except (TypeError, ValueError, IndexError):
+                return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime(PUBLISHED_FORMAT)
+
+
+def _utc_now():
+    return datetime.now(timezone.utc).strftime(PUBLISHED_FORMAT)
+
+
+def _cut_off(value):
+    """Normalise a date used as a range boundary, rejecting values that are not dates."""
+    normalized = normalize_published(value)
+    if normalized is None:
+        raise ValueError(f"Not a recognisable date: {value!r}")
+    return normalized
+
+
+def _add_version_column(connection, table):
+    """
+    Make sure a table has the version column bumped by every insert or change (used as an ingest watermark).
+    Rows from before the column existed get their id as version, which keeps id-based watermarks valid.
+    """
+    if "version" not in _column_names(connection, table):
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        connection.execute(f"UPDATE {table} SET version = id")
+    connection.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_version ON {table}(version)")
+
+
+def _fts_query(text):
+    """Quote every word of free text so FTS5 treats it as plain terms (all must match)."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+class ConnectionManager:
+    def __init__(self, db_name, busy_timeout=5000):
+        """
+        Hands every thread its own connection to one SQLite file.
+        Streamlit runs scripts on several threads, and a sqlite3 connection must not be shared between them.
+        :param db_name: Name of the SQLite database file.
+        :param busy_timeout: Milliseconds a connection waits for a lock held by another connection.
+        """
+        self.db_name = db_name
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._open = []  # (thread, connection) pairs, to close on shutdown or when the thread is gone
+        self._lock = threading.Lock()
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # check_same_thread=False only so that close_all() may close connections of finished threads
+            connection = sqlite3.connect(self.db_name, check_same_thread=False)
+            _configure_connection(connection, self.busy_timeout)
+            self._local.connection = connection
+            self._local.cursor = connection.cursor()
+            with self._lock:
+                self._close_dead_threads()
+                self._open.append((threading.current_thread(), connection))
+        return connection
+
+    def cursor(self):
+        """Return the calling thread's shared cursor."""
+        self.connection()
+        return self._local.cursor
+
+    def _close_dead_threads(self):
+        alive = []
+        for thread, connection in self._open:
+            if thread.is_alive():
+                alive.append((thread, connection))
+            else:
+                connection.close()
+        self._open = alive
+
+    def close_current(self):
+        """Close the calling thread's connection; a new one is opened on next use."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            return
+        with self._lock:
+            self._open = [(t, c) for t, c in self._open if c is not connection]
+        connection.close()
+        self._local.connection = None
+        self._local.cursor = None
+
+    def close_all(self):
+        """Close the connections of every thread."""
+        with self._lock:
+            for _, connection in self._open:
+                connection.close()
+            self._open = []
+        self._local = threading.local()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_manager(db_name):
+    """Return the process-wide ConnectionManager for a database file."""
+    key = os.path.abspath(db_name)
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = ConnectionManager(db_name)
+        return _managers[key]
+
+
+@atexit.register
+def close_all_connections():
+    """Close every pooled connection; runs automatically on interpreter shutdown."""
+    with _managers_lock:
+        for manager in _managers.values():
+            manager.close_all()
+
+
+class _ManagedDatabase:
+    """Base for the database classes: connection and cursor belong to the calling thread."""
+
+    @property
+    def connection(self):
+        return self.manager.connection()
+
+    @property
+    def cursor(self):
+        return self.manager.cursor()
+
+    def close(self):
+        """
+        Close the calling thread's database connection.
+        """
+        self.manager.close_current()
+
+
+class ChatDatabase(_ManagedDatabase):
     def __init__(self, db_name: str = "chatbot.db"):
         """
         Initialize the ChatDatabase class.
         :param db_name: Name of the SQLite database file.
         """
-        self.connection = sqlite3.connect(db_name)
-        self.cursor = self.connection.cursor()
+        self.db_name = db_name
+        self.manager = get_manager(db_name)
         self._create_tables()
 
     def _create_tables(self):
@@ -21,101 +208,121 @@ class ChatDatabase:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                 user_message TEXT NOT NULL,
-                bot_response TEXT NOT NULL
-            )
-            """
-        )
-        self.cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS last_three_chats (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                user_message TEXT NOT NULL,
-                bot_response TEXT NOT NULL
+                bot_response TEXT NOT NULL,
+                session_id TEXT NOT NULL DEFAULT ''
             )
             """
         )
+        # Databases created before chats were stored per session
+        if "session_id" not in _column_names(self.connection, "all_chats"):
+            self.cursor.execute("ALTER TABLE all_chats ADD COLUMN session_id TEXT NOT NULL DEFAULT ''")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_all_chats_session ON all_chats(session_id, id)")
+        # The last chats are now read from all_chats through the index above
+        self.cursor.execute("DROP TABLE IF EXISTS last_three_chats")
         self.connection.commit()
 
-    def insert_chat(self, user_message: str, bot_response: str):
+    def insert_chat(self, user_message: str, bot_response: str, session_id: str = ""):
         """
-        Insert a new chat into the all_chats table and update the last_three_chats table.
+        Insert a new chat into the all_chats table in a single transaction.
         :param user_message: The user's message.
         :param bot_response: The bot's response.
+        :param session_id: The chat session the message belongs to.
         """
-        self.cursor.execute(
-            "INSERT INTO all_chats (user_message, bot_response) VALUES (?, ?)",
-            (user_message, bot_response)
-        )
-        self.connection.commit()
-        self._update_last_three_chats(user_message, bot_response)
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO all_chats (user_message, bot_response, session_id) VALUES (?, ?, ?)",
+                (user_message, bot_response, session_id)
+            )
 
-    def _update_last_three_chats(self, user_message: str, bot_response: str):
+    def insert_chats_bulk(self, chats: Iterable[Tuple[str, str, str]]) -> int:
         """
-        Update the last_three_chats table to keep only the last three chats.
-        :param user_message: The user's message.
-        :param bot_response: The bot's response.
+        Insert many chats in a single transaction.
+        :param chats: Iterable of (user_message, bot_response, session_id).
+        :return: Number of chats inserted.
         """
-        self.cursor.execute(
-            "INSERT INTO last_three_chats (user_message, bot_response) VALUES (?, ?)",
-            (user_message, bot_response)
-        )
-        self.connection.commit()
-
-        # Ensure only the last three chats are kept
-        self.cursor.execute(
-            """
-            DELETE FROM last_three_chats
-            WHERE id NOT IN (
-                SELECT id FROM last_three_chats ORDER BY timestamp DESC LIMIT 3
+        with self.connection:
+            cursor = self.connection.executemany(
+                "INSERT INTO all_chats (user_message, bot_response, session_id) VALUES (?, ?, ?)",
+                chats
             )
-            """
-        )
-        self.connection.commit()
+        return cursor.rowcount
 
-    def fetch_all_chats(self) -> List[Tuple[int, str, str, str]]:
+    def fetch_all_chats(self, session_id: str = None, after_id: int = 0,
+                        limit: int = 100) -> List[Tuple[int, str, str, str]]:
         """
-        Fetch all chats from the all_chats table.
-        :return: List of tuples containing all chat records.
+        Fetch one page of chats from the all_chats table, oldest first.
+        :param session_id: Only return chats of this session (default is all sessions).
+        :param after_id: Return chats with an id greater than this; pass the id of the last
+                         chat of the previous page to get the next page.
+        :param limit: Maximum number of chats returned.
+        :return: List of (id, timestamp, user_message, bot_response) tuples.
         """
-        self.cursor.execute("SELECT * FROM all_chats ORDER BY timestamp ASC")
-        return self.cursor.fetchall()
+        if session_id is None:
+            query = "SELECT id, timestamp, user_message, bot_response FROM all_chats WHERE id > ? ORDER BY id LIMIT ?"
+            params = (after_id, limit)
+        else:
+            query = ("SELECT id, timestamp, user_message, bot_response FROM all_chats "
+                     "WHERE session_id = ? AND id > ? ORDER BY id LIMIT ?")
+            params = (session_id, after_id, limit)
+        return self.connection.execute(query, params).fetchall()
+
+    def iter_chats(self, session_id: str = None, batch_size: int = 500) -> Iterator[Tuple[int, str, str, str]]:
+        """
+        Stream all chats page by page without loading the whole table.
+        :param session_id: Only return chats of this session (default is all sessions).
+        :param batch_size: Number of rows read per query.
+        """
+        after_id = 0
+        while True:
+            rows = self.fetch_all_chats(session_id, after_id, batch_size)
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1][0]
+
+    def fetch_last_chats(self, session_id: str = "", n: int = 3) -> List[Tuple[int, str, str, str]]:
+        """
+        Fetch the most recent chats of a session, newest first.
+        :param session_id: The chat session.
+        :param n: Number of chats to return.
+        :return: List of (id, timestamp, user_message, bot_response) tuples.
+        """
+        return self.connection.execute(
+            "SELECT id, timestamp, user_message, bot_response FROM all_chats "
+            "WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, n)
+        ).fetchall()
 
-    def fetch_last_three_chats(self) -> List[Tuple[int, str, str, str]]:
+    def fetch_last_three_chats(self, session_id: str = "") -> List[Tuple[int, str, str, str]]:
         """
-        Fetch the last three chats from the last_three_chats table.
+        Fetch the last three chats of a session.
         :return: List of tuples containing the last three chat records.
         """
-        self.cursor.execute("SELECT * FROM last_three_chats ORDER BY timestamp DESC")
-        return self.cursor.fetchall()
+        return self.fetch_last_chats(session_id, 3)
 
     def delete_chat_by_id(self, chat_id: int, table: str = "all_chats") -> bool:
         """
-        Delete a chat by its ID from the specified table.
+        Delete a chat by its ID.
         :param chat_id: The ID of the chat to delete.
-        :param table: The table from which to delete the chat (default is "all_chats").
+        :param table: Must be "all_chats", the only chat table.
         :return: True if a row was deleted, False otherwise.
         """
-        if table not in ["all_chats", "last_three_chats"]:
-            raise ValueError("Invalid table name. Use 'all_chats' or 'last_three_chats'.")
-
-        self.cursor.execute(f"DELETE FROM {table} WHERE id = ?", (chat_id,))
-        self.connection.commit()
-        return self.cursor.rowcount > 0
+        if table == "last_three_chats":
+            # Deleting from all_chats instead would remove the chat from the history, not just the recent list
+            raise ValueError("The last_three_chats table no longer exists; the last chats are read from all_chats.")
+        if table != "all_chats":
+            raise ValueError("Invalid table name. Use 'all_chats'.")
 
-    def close(self):
-        """
-        Close the database connection.
-        """
-        self.connection.close()
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM all_chats WHERE id = ?", (chat_id,))
+        return cursor.rowcount > 0
 
 
 
-class JobInfoDB:
+class JobInfoDB(_ManagedDatabase):
     def __init__(self, db_name="job_info.db"):
         self.db_name = db_name
-        self.connection = sqlite3.connect(self.db_name)
-        self.cursor = self.connection.cursor()
+        self.manager = get_manager(self.db_name)
         self.create_table()
 
     def create_table(self):
@@ -129,47 +336,163 @@ class JobInfoDB:
                 location TEXT NOT NULL,
                 mainsalary REAL,
                 maxsalary REAL,
-                jobdescription TEXT
+                jobdescription TEXT,
+                jobid INTEGER,
+                version INTEGER NOT NULL DEFAULT 0
             )
             """
         )
+        # Databases created before jobs were keyed by the Reed jobId
+        if "jobid" not in _column_names(self.connection, "jobs"):
+            self.cursor.execute("ALTER TABLE jobs ADD COLUMN jobid INTEGER")
+        _add_version_column(self.connection, "jobs")
+        self.cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_jobid ON jobs(jobid)")
+        # Location filters seek on (location, id) and check salaries without reading the row
+        self.cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_location ON jobs(location COLLATE NOCASE, id, mainsalary, maxsalary)"
+        )
+        # Salary-only filters page on (salary, id), so id comes right after the salary it is sorted by
+        self.cursor.execute("DROP INDEX IF EXISTS idx_jobs_salary")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_mainsalary ON jobs(mainsalary, id, maxsalary)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_jobs_maxsalary ON jobs(maxsalary, id, mainsalary)")
+        self._create_fts()
         self.connection.commit()
 
-    def add_job(self, jobtitle, employername, location, mainsalary, maxsalary, jobdescription):
-        """Add a new job record to the database."""
+    def _create_fts(self):
+        """Create the FTS5 index over job titles and descriptions, kept in sync by triggers."""
+        if _table_exists(self.connection, "jobs_fts"):
+            return
         self.cursor.execute(
+            "CREATE VIRTUAL TABLE jobs_fts USING fts5(jobtitle, jobdescription, content='jobs', content_rowid='id', tokenize='porter unicode61')"
+        )
+        self.cursor.executescript(
+            """
+            CREATE TRIGGER jobs_fts_ai AFTER INSERT ON jobs BEGIN
+                INSERT INTO jobs_fts(rowid, jobtitle, jobdescription) VALUES (new.id, new.jobtitle, new.jobdescription);
+            END;
+            CREATE TRIGGER jobs_fts_ad AFTER DELETE ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, jobtitle, jobdescription)
+                VALUES ('delete', old.id, old.jobtitle, old.jobdescription);
+            END;
+            CREATE TRIGGER jobs_fts_au AFTER UPDATE ON jobs BEGIN
+                INSERT INTO jobs_fts(jobs_fts, rowid, jobtitle, jobdescription)
+                VALUES ('delete', old.id, old.jobtitle, old.jobdescription);
+                INSERT INTO jobs_fts(rowid, jobtitle, jobdescription) VALUES (new.id, new.jobtitle, new.jobdescription);
+            END;
             """
-            INSERT INTO jobs (jobtitle, employername, location, mainsalary, maxsalary, jobdescription)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (jobtitle, employername, location, mainsalary, maxsalary, jobdescription)
         )
-        self.connection.commit()
+        # Index the rows that existed before the FTS table
+        self.cursor.execute("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')")
+
+    def add_job(self, jobtitle, employername, location, mainsalary, maxsalary, jobdescription, jobid=None):
+        """Add a job record, or update it if a job with the same Reed jobid exists."""
+        self.add_jobs_bulk([(jobid, jobtitle, employername, location, mainsalary, maxsalary, jobdescription)])
+
+    def add_jobs_bulk(self, jobs):
+        """
+        Insert or update many jobs in a single transaction.
+        :param jobs: Iterable of (jobid, jobtitle, employername, location, mainsalary, maxsalary, jobdescription).
+                     Rows with an existing Reed jobid replace the stored job. Every inserted or changed
+                     row gets the next version number, so readers can pick up changes past a version.
+        :return: Number of rows written.
+        """
+        with self.connection:
+            cursor = self.connection.executemany(
+                """
+                INSERT INTO jobs (jobid, jobtitle, employername, location, mainsalary, maxsalary, jobdescription, version)
+                VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM jobs))
+                ON CONFLICT(jobid) DO UPDATE SET
+                    jobtitle = excluded.jobtitle,
+                    employername = excluded.employername,
+                    location = excluded.location,
+                    mainsalary = excluded.mainsalary,
+                    maxsalary = excluded.maxsalary,
+                    jobdescription = excluded.jobdescription,
+                    version = (SELECT MAX(version) + 1 FROM jobs)
+                WHERE (jobs.jobtitle, jobs.employername, jobs.location, jobs.mainsalary, jobs.maxsalary, jobs.jobdescription)
+                    IS NOT (excluded.jobtitle, excluded.employername, excluded.location, excluded.mainsalary,
+                            excluded.maxsalary, excluded.jobdescription)
+                """,
+                jobs
+            )
+        return cursor.rowcount
 
-    def retrieve_jobs(self, filter_query=None):
-        """Retrieve jobs from the database with an optional filter query."""
+    def retrieve_jobs(self, filter_query=None, params=()):
+        """
+        Retrieve jobs from the database with an optional filter query.
+        Pass values through params with ? placeholders (e.g., "location = ?", ("London",));
+        prefer search_jobs() for user-supplied filters.
+        """
         query = "SELECT * FROM jobs"
         if filter_query:
             query += f" WHERE {filter_query}"
-        self.cursor.execute(query)
+        self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
+    def search_jobs(self, location=None, min_salary=None, max_salary=None, keyword=None, after=None, limit=50):
+        """
+        Search jobs with indexed, parameterized filters and keyset pagination.
+        Keyword searches page through the FTS5 index and location searches through the location index,
+        both in id order. Searches filtered by salary only page through a salary index, ordered by
+        mainsalary (or by maxsalary when only max_salary is given), then id.
+        :param location: Exact location, case-insensitive (e.g., "London").
+        :param min_salary: Only jobs whose mainsalary is at least this value.
+        :param max_salary: Only jobs whose maxsalary is at most this value.
+        :param keyword: Words that must all appear in the job title or description (FTS5).
+        :param after: The last row of the previous page, to get the next page (default is the first page).
+        :param limit: Maximum number of rows returned.
+        :return: List of job rows.
+        """
+        conditions, params = [], []
+        if keyword and keyword.strip():
+            # Driven from jobs_fts so FTS5 returns matches in rowid order and stops at the limit
+            query = "SELECT jobs.* FROM jobs_fts CROSS JOIN jobs ON jobs.id = jobs_fts.rowid"
+            conditions.append("jobs_fts MATCH ?")
+            params.append(_fts_query(keyword))
+            order_by = ["jobs_fts.rowid"]
+        else:
+            query = "SELECT jobs.* FROM jobs"
+            if location:
+                order_by = ["jobs.id"]
+            elif min_salary is not None:
+                order_by = ["jobs.mainsalary", "jobs.id"]
+            elif max_salary is not None:
+                order_by = ["jobs.maxsalary", "jobs.id"]
+            else:
+                order_by = ["jobs.id"]
+        if location:
+            conditions.append("jobs.location = ? COLLATE NOCASE")
+            params.append(location)
+        if min_salary is not None:
+            conditions.append("jobs.mainsalary >= ?")
+            params.append(min_salary)
+        if max_salary is not None:
+            conditions.append("jobs.maxsalary <= ?")
+            params.append(max_salary)
+        if after is not None:
+            # Row positions of the jobs columns: id 0, mainsalary 4, maxsalary 5
+            keys = {"jobs_fts.rowid": after[0], "jobs.id": after[0], "jobs.mainsalary": after[4],
+                    "jobs.maxsalary": after[5]}
+            conditions.append(f"({', '.join(order_by)}) > ({', '.join('?' * len(order_by))})")
+            params.extend(keys[column] for column in order_by)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {', '.join(order_by)} LIMIT ?"
+        params.append(limit)
+        return self.connection.execute(query, params).fetchall()
+
     def delete_job(self, job_id):
         """Delete a job record by ID."""
         self.cursor.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
         self.connection.commit()
 
-    def close(self):
-        """Close the database connection."""
-        self.connection.close()
 
 import sqlite3
 
-class ArticleInfoDB:
+class ArticleInfoDB(_ManagedDatabase):
     def __init__(self, db_name="article_info.db"):
         self.db_name = db_name
-        self.connection = sqlite3.connect(self.db_name)
-        self.cursor = self.connection.cursor()
+        self.manager = get_manager(self.db_name)
         self.create_table()
 
     def create_table(self):
@@ -181,39 +504,169 @@ class ArticleInfoDB:
                 title TEXT NOT NULL,
                 published TEXT NOT NULL,
                 url TEXT NOT NULL,
-                content TEXT
+                content TEXT,
+                version INTEGER NOT NULL DEFAULT 0
             )
             """
         )
+        _add_version_column(self.connection, "articles")
+        has_url_index = self.cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_articles_url'"
+        ).fetchone()
+        if not has_url_index:
+            # Older databases may hold the same article twice; keep the first copy
+            self.cursor.execute("DELETE FROM articles WHERE id NOT IN (SELECT MIN(id) FROM articles GROUP BY url)")
+            self.cursor.execute("CREATE UNIQUE INDEX idx_articles_url ON articles(url)")
+        if self.cursor.execute("PRAGMA user_version").fetchone()[0] < 1:
+            # Range queries and retention need one sortable format; convert dates stored in any other
+            # (plain dates, RSS dates) once and give rows without a usable date the time of this conversion.
+            # add_articles_bulk() stores every newer date in PUBLISHED_FORMAT.
+            stale = self.cursor.execute(
+                "SELECT id, published FROM articles WHERE published IS NULL OR published NOT GLOB ?",
+                (_PUBLISHED_GLOB,)
+            ).fetchall()
+            if stale:
+                now = _utc_now()
+                self.cursor.executemany(
+                    "UPDATE articles SET published = ? WHERE id = ?",
+                    [(normalize_published(published) or now, article_id) for article_id, published in stale]
+                )
+            self.cursor.execute("PRAGMA user_version = 1")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_published ON articles(published)")
+        self._create_fts()
         self.connection.commit()
 
-    def add_article(self, title, published, url, content):
-        """Add a new article record to the database."""
+    def _create_fts(self):
+        """Create the FTS5 index over article titles and content, kept in sync by triggers."""
+        if _table_exists(self.connection, "articles_fts"):
+            return
         self.cursor.execute(
+            "CREATE VIRTUAL TABLE articles_fts USING fts5(title, content, content='articles', content_rowid='id', tokenize='porter unicode61')"
+        )
+        self.cursor.executescript(
+            """
+            CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END;
+            CREATE TRIGGER articles_fts_ad AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            END;
+            CREATE TRIGGER articles_fts_au AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts(articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO articles_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+            END;
             """
-            INSERT INTO articles (title, published, url, content)
-            VALUES (?, ?, ?, ?)
-            """,
-            (title, published, url, content)
         )
-        self.connection.commit()
+        # Index the rows that existed before the FTS table
+        self.cursor.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+
+    def add_article(self, title, published, url, content):
+        """Add an article record, or update it if an article with the same URL exists."""
+        self.add_articles_bulk([(title, published, url, content)])
+
+    def add_articles_bulk(self, articles):
+        """
+        Insert or update many articles in a single transaction.
+        :param articles: Iterable of (title, published, url, content). Rows with an existing URL replace the stored article.
+                         Articles without a recognisable date are stored with the current time, and an update
+                         without one keeps the stored date. Every inserted or changed row gets the next version number.
+        :return: Number of rows written.
+        """
+        now = _utc_now()
+        with self.connection:
+            cursor = self.connection.executemany(
+                """
+                INSERT INTO articles (title, published, url, content, version)
+                VALUES (:title, COALESCE(:published, :now), :url, :content,
+                        (SELECT COALESCE(MAX(version), 0) + 1 FROM articles))
+                ON CONFLICT(url) DO UPDATE SET
+                    title = excluded.title,
+                    published = COALESCE(:published, articles.published),
+                    content = excluded.content,
+                    version = (SELECT MAX(version) + 1 FROM articles)
+                WHERE (articles.title, articles.published, articles.content)
+                    IS NOT (excluded.title, COALESCE(:published, articles.published), excluded.content)
+                """,
+                [{"title": title, "published": normalize_published(published), "now": now, "url": url,
+                  "content": content} for title, published, url, content in articles]
+            )
+        return cursor.rowcount
 
-    def retrieve_articles(self, filter_query=None):
-        """Retrieve articles from the database with an optional filter query."""
+    def retrieve_articles(self, filter_query=None, params=()):
+        """
+        Retrieve articles from the database with an optional filter query.
+        Pass values through params with ? placeholders; prefer search_articles() for user-supplied filters.
+        """
         query = "SELECT * FROM articles"
         if filter_query:
             query += f" WHERE {filter_query}"
-        self.cursor.execute(query)
+        self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
+    def search_articles(self, query=None, since=None, until=None, limit=10):
+        """
+        Full-text search over article titles and content, optionally limited to a publication window.
+        :param query: Words that must all appear in the article; results are ranked by bm25
+                      (title matches weigh more). Without a query the newest articles come first.
+        :param since: Earliest publication date (inclusive); str, date or datetime (plain dates mean midnight UTC).
+        :param until: Latest publication date (exclusive); str, date or datetime (plain dates mean midnight UTC).
+        :param limit: Maximum number of rows returned.
+        :return: List of article rows.
+        """
+        sql = "SELECT articles.* FROM articles"
+        conditions, params = [], []
+        if query and query.strip():
+            sql += " JOIN articles_fts ON articles_fts.rowid = articles.id"
+            conditions.append("articles_fts MATCH ?")
+            params.append(_fts_query(query))
+        if since is not None:
+            conditions.append("articles.published >= ?")
+            params.append(_cut_off(since))
+        if until is not None:
+            conditions.append("articles.published < ?")
+            params.append(_cut_off(until))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if query and query.strip():
+            sql += " ORDER BY bm25(articles_fts, 10.0, 1.0)"
+        else:
+            sql += " ORDER BY articles.published DESC"
+        sql += " LIMIT ?"
+        params.append(limit)
+        return self.connection.execute(sql, params).fetchall()
+
+    def purge_articles(self, before):
+        """
+        Delete articles published before a date.
+        :param before: Cut-off date; str, date or datetime.
+        :return: Number of articles deleted.
+        """
+        with self.connection:
+            cursor = self.connection.execute("DELETE FROM articles WHERE published < ?", (_cut_off(before),))
+        return cursor.rowcount
+
+    def compact(self):
+        """Merge the full-text index segments and give the space of deleted rows back to the file system."""
+        with self.connection:
+            self.connection.execute("INSERT INTO articles_fts(articles_fts) VALUES ('optimize')")
+        self.connection.execute("VACUUM")
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def run_retention(self, max_age_days=180, compact=True):
+        """
+        Retention job: drop articles older than max_age_days, then compact the database.
+        :return: Number of articles deleted.
+        """
+        deleted = self.purge_articles(datetime.now(timezone.utc) - timedelta(days=max_age_days))
+        if compact and deleted:
+            self.compact()
+        return deleted
+
     def delete_article(self, article_id):
         """Delete an article record by ID."""
         self.cursor.execute("DELETE FROM articles WHERE id = ?", (article_id,))
         self.connection.commit()
 
-    def close(self):
-        """Close the database connection."""
-        self.connection.close()
 
 # Example Usage
 if __name__ == "__main__":
@@ -239,8 +692,8 @@ if __name__ == "__main__":
     for article in articles:
         print(article)
 
-    # Retrieve articles with a filter
-    filtered_articles = db.retrieve_articles("published = '2025-01-19'")
+    # Retrieve articles published in a date range
+    filtered_articles = db.search_articles(since="2025-01-19", until="2025-01-20")
     print("\nArticles Published on 2025-01-19:")
     for article in filtered_articles:
         print(article)
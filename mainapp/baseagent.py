@@ -1,33 +1,65 @@
 import json
-from openai import OpenAI
+from llmgateway import get_gateway, BACKGROUND, StreamStats
+
+
+class CompletionStream:
+    def __init__(self, deltas, stats):
+        """
+        Iterable of the text deltas of one streamed completion (can be passed to st.write_stream).
+        :param deltas: Generator of text pieces.
+        :param stats: StreamStats of the request; complete once the stream is exhausted.
+        """
+        self._deltas = deltas
+        self.stats = stats
+        self.parts = []
+
+    def __iter__(self):
+        for delta in self._deltas:
+            self.parts.append(delta)
+            yield delta
+
+    @property
+    def text(self):
+        """Text received so far."""
+        return "".join(self.parts)
+
+    def close(self):
+        self._deltas.close()
+
 
 class BaseAgent:
+    priority = BACKGROUND  # Queue priority of this agent's requests in the LLM gateway
+
     def __init__(self, name, instructions):
         self.name = name
         self.instructions = instructions  # Fixed typo from self.insctructions
-        self.ollama_client = OpenAI(
-            base_url="http://localhost:11434/v1",
-            api_key="ollama",
-        )
+        self.gateway = get_gateway()
+
+    @property
+    def ollama_client(self):
+        return self.gateway.client
 
     async def run(self):
         raise NotImplementedError("Subclasses must implement the run method.")
 
-    def _query_ollama(self, prompt, temperature=0.5, max_tokens=300):
+    def _messages(self, prompt, system=None):
+        return [
+            {"role": "system", "content": system or self.instructions},  # Fixed typo
+            {"role": "user", "content": f"my cv: {prompt}"}
+        ]
+
+    def _query_ollama(self, prompt, temperature=0.5, max_tokens=300, system=None):
         try:
-            response = self.ollama_client.chat.completions.create(
+            response = self.gateway.complete(
+                priority=self.priority,
                 model="llama3",
-                messages=[
-                    {"role": "system", "content": self.instructions},  # Fixed typo
-                    {"role": "user", "content": f"my cv: {prompt}"}
-                ],
+                messages=self._messages(prompt, system),
                 temperature=temperature,  # Now accepts dynamic temperature
                 max_tokens=max_tokens,  # Now accepts dynamic max_tokens
             )
 
             # Ensure response structure is correct
             if hasattr(response, "choices") and response.choices:
-                print(response.choices[0].message.content)
                 return response.choices[0].message.content
                 
             return "Error: No valid response received from Ollama."
@@ -35,6 +67,56 @@ class BaseAgent:
         except Exception as e:
             return f"API Error: {str(e)}"
 
+    def _stream_ollama(self, prompt, temperature=0.5, max_tokens=300, system=None, stats=None):
+        """
+        Streaming version of _query_ollama().
+        :param stats: Optional StreamStats to fill in (by default a new one is used).
+        :return: CompletionStream yielding text deltas; errors are yielded as an "API Error: ..." piece.
+        """
+        stats = stats or StreamStats()
+
+        def deltas():
+            try:
+                yield from self.gateway.stream_complete(
+                    priority=self.priority,
+                    stats=stats,
+                    model="llama3",
+                    messages=self._messages(prompt, system),
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
+            except Exception as e:
+                yield f"API Error: {str(e)}"
+
+        return CompletionStream(deltas(), stats)
+
+    def _query_ollama_json(self, prompt, schema, temperature=0.2, max_tokens=800, system=None):
+        """
+        Ask for a JSON object matching a JSON schema (Ollama constrains decoding to the schema).
+        :return: The decoded object, or {"error": ...} if the request or decoding failed.
+        """
+        try:
+            response = self.gateway.complete(
+                priority=self.priority,
+                model="llama3",
+                messages=self._messages(prompt, system),
+                temperature=temperature,
+                max_tokens=max_tokens,
+                response_format={"type": "json_schema",
+                                 "json_schema": {"name": "response", "schema": schema}},
+            )
+            if not (hasattr(response, "choices") and response.choices):
+                return {"error": "No valid response received from Ollama."}
+            content = response.choices[0].message.content or ""
+        except Exception as e:
+            return {"error": f"API Error: {str(e)}"}
+
+        try:
+            # Constrained output is plain JSON; only fall back to searching the text if it is not
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return self._parse_json_safely(content)
+
     def _parse_json_safely(self, text):
         try:
             start = text.find("{")
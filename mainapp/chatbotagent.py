@@ -1,47 +1,148 @@
-from langchain_ollama import ChatOllama
+import asyncio
+import threading
 from langchain_core.messages import SystemMessage, AIMessage, HumanMessage
-import streamlit as st
 import DBMS  # Your database module
-from langchain.retrievers.multi_query import MultiQueryRetriever
-from langchain_chroma import Chroma
-from langchain_ollama import OllamaEmbeddings
-from summarizeragent import summarizer
+from contentcache import get_default_cache, content_hash
+from semanticcache import SemanticCache
+from retrieval import ContextRetriever
+from chatlog import ChatLogWriter
+from llmgateway import get_gateway, INTERACTIVE
+
+
+def messages_to_text(messages):
+    """Render user and assistant messages as sentences that the summarizer can tokenize."""
+    lines = []
+    for message in messages:
+        if message.type not in ("human", "ai"):
+            continue
+        content = str(message.content).strip()
+        if content and content[-1] not in ".!?":
+            content += "."
+        role = "User" if message.type == "human" else "Assistant"
+        lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+class RollingSummary:
+    def __init__(self, length=5):
+        """
+        Running summary of the messages that have fallen out of the chat history window.
+        Keep one per session (e.g., in st.session_state).
+        :param length: Number of sentences kept in the running summary.
+        """
+        self.length = length
+        self.text = ""
+        self.watermark = 0  # Number of leading messages already folded into text
+
+    def reset(self):
+        self.text = ""
+        self.watermark = 0
+
+
 class ChatbotAgent:
-    def __init__(self, model="llama3", keep_alive=False, history_limit=25):
-        self.llm = ChatOllama(model=model, temperature=0.7, keep_alive=keep_alive, num_predict=300, num_thread=6)
-        self.vector_db = Chroma(persist_directory="chroma_db", embedding_function=OllamaEmbeddings(model="nomic-embed-text"))
-        self.db = DBMS.ChatDatabase()
+    def __init__(self, model="llama3", keep_alive=False, history_limit=25, retriever_options=None):
+        # The model client, vector store, embeddings and databases are created on first use
+        # (see the properties below), so constructing the agent is cheap.
+        self.model = model
+        self.keep_alive = keep_alive
         self.history_limit = history_limit
+        self.retriever_options = retriever_options or {}
+        self.gateway = get_gateway()
+        self.cache = get_default_cache()
+        self._init_lock = threading.RLock()
+
+    def _lazy(self, name, factory):
+        value = self.__dict__.get(name)
+        if value is None:
+            with self._init_lock:
+                value = self.__dict__.get(name)
+                if value is None:
+                    value = factory()
+                    self.__dict__[name] = value
+        return value
+
+    @property
+    def llm(self):
+        return self._lazy("_llm", lambda: self.gateway.chat_model(
+            model=self.model, temperature=0.7, keep_alive=self.keep_alive, num_predict=300, num_thread=6))
+
+    @property
+    def embeddings(self):
+        def create():
+            from langchain_ollama import OllamaEmbeddings
+            return OllamaEmbeddings(model="nomic-embed-text")
+        return self._lazy("_embeddings", create)
+
+    @property
+    def vector_db(self):
+        def create():
+            from langchain_chroma import Chroma
+            return Chroma(persist_directory="chroma_db", embedding_function=self.embeddings)
+        return self._lazy("_vector_db", create)
+
+    @property
+    def semantic_cache(self):
+        return self._lazy("_semantic_cache", lambda: SemanticCache(self.embeddings))
+
+    @property
+    def retriever(self):
+        # top-k, MMR, score cutoff, metadata filters and context budget; see ContextRetriever
+        return self._lazy("_retriever", lambda: ContextRetriever(self.vector_db, self.embeddings,
+                                                                 **self.retriever_options))
+
+    @property
+    def db(self):
+        return self._lazy("_db", DBMS.ChatDatabase)
+
+    @property
+    def chat_log(self):
+        # Chat turns are committed in groups by a background thread, off the user's turn
+        return self._lazy("_chat_log", lambda: ChatLogWriter(self.db))
 
     def summarize_conversation(self, messages,length=5):
-        x = summarizer(messages)
-        return x.run(length)
+        from summarizeragent import get_engine  # sumy/NLTK load only once a summary is needed
+        if not isinstance(messages, str):
+            messages = messages_to_text(messages)
+        return get_engine().summarize(messages, length)
 
-    def trim_chat_history(self, message_history):
+    def trim_chat_history(self, message_history, rolling_summary=None):
         if len(message_history) > self.history_limit:
-            # Summarize older messages
-            summary = self.summarize_conversation(message_history[:-self.history_limit])
+            if rolling_summary is not None:
+                summary = self._fold_into_summary(message_history, rolling_summary)
+            else:
+                # Summarize older messages
+                summary = self.summarize_conversation(message_history[:-self.history_limit])
             summarized_message = SystemMessage(f"Summary of previous conversation: {summary}")
             return [summarized_message] + message_history[-self.history_limit:]
         return message_history
 
-    def chat(self, message_history,analyzed_cv):
-        summarized_cv = "not given yet"
-        if not message_history:
-            return
+    def _fold_into_summary(self, message_history, rolling_summary):
+        # Only the messages that left the window since the last turn are summarized,
+        # together with the previous summary, so the cost per turn stays constant.
+        cutoff = len(message_history) - self.history_limit
+        if cutoff < rolling_summary.watermark:
+            # The history was replaced or shortened; start over
+            rolling_summary.reset()
+        new_text = messages_to_text(message_history[rolling_summary.watermark:cutoff])
+        if new_text:
+            combined = f"{rolling_summary.text}\n{new_text}" if rolling_summary.text else new_text
+            rolling_summary.text = self.summarize_conversation(combined, length=rolling_summary.length)
+        rolling_summary.watermark = cutoff
+        return rolling_summary.text
+
+    def _summarize_cv(self, analyzed_cv):
         if analyzed_cv:
-            summarized_cv  = self.summarize_conversation(analyzed_cv,length=10)
-        # Trim chat history to manage memory efficiently
-        message_history = self.trim_chat_history(message_history)
-        
-        # Extract latest user message
-        last_message = message_history[-1]
-        user_prompt = last_message.content
-        
-        # Retrieve relevant documents
-        retriever = self.vector_db.as_retriever()
-        context_docs = retriever.get_relevant_documents(user_prompt)
-        formatted_context = "\n\n".join(doc.page_content for doc in context_docs) if context_docs else ""
+            # The report does not change between turns, so summarize it once per distinct text
+            return self.cache.get_or_compute(
+                "cv_summary:10", analyzed_cv, lambda: self.summarize_conversation(analyzed_cv, length=10)
+            )
+        return "not given yet"
+
+    def _retrieve_context(self, user_prompt, query_vector=None):
+        return self.retriever.retrieve(user_prompt, query_vector)
+
+    def _build_input_messages(self, message_history, summarized_cv, context_docs):
+        formatted_context = self.retriever.format_context(context_docs)
         
         # Create system message (not stored in message history)
         system_message = SystemMessage(f"""
@@ -54,16 +155,90 @@ class ChatbotAgent:
         """)
         
         # Prepare input messages (system message + chat history)
-        input_messages = [system_message] + message_history
+        return [system_message] + message_history
+
+    def _semantic_lookup(self, message_history, analyzed_cv, user_data):
+        # Only opening questions are answered from the cache: follow-ups depend on the
+        # conversation so far and would match unrelated answers.
+        if any(message.type == "ai" for message in message_history[:-1]):
+            return None, None, None
+        scope = SemanticCache.scope_for(user_data, content_hash(analyzed_cv) if analyzed_cv else None)
+        vector = self.semantic_cache.embed(message_history[-1].content)
+        return vector, scope, self.semantic_cache.lookup(vector, scope)
+
+    def chat(self, message_history,analyzed_cv, rolling_summary=None, user_data=None, session_id=""):
+        if not message_history:
+            return
+        vector, scope, cached = self._semantic_lookup(message_history, analyzed_cv, user_data)
+        if cached is not None:
+            yield from cached
+            self.chat_log.log(message_history[-1].content, "".join(cached), session_id)
+            return
+        summarized_cv = self._summarize_cv(analyzed_cv)
+        # Trim chat history to manage memory efficiently
+        message_history = self.trim_chat_history(message_history, rolling_summary)
+        
+        # Extract latest user message
+        last_message = message_history[-1]
+        user_prompt = last_message.content
+        
+        # Retrieve relevant documents
+        context_docs = self._retrieve_context(user_prompt, vector)
+        input_messages = self._build_input_messages(message_history, summarized_cv, context_docs)
         
         # Generate response using LLM
-        response = self.llm.stream(input_messages)
+        response = self.gateway.stream(self.llm, input_messages, priority=INTERACTIVE)
         # Save conversation in the database
-        full_response = ""
+        chunks = []
         for chunk in response:
-            full_response += chunk.content
+            chunks.append(chunk.content)
             yield chunk.content
+        if vector is not None:
+            self.semantic_cache.store(vector, scope, chunks)
         # Collect response and save conversation
-        self.db.insert_chat(user_prompt, full_response)
-        
- 
\ No newline at end of file
+        self.chat_log.log(user_prompt, "".join(chunks), session_id)
+
+    async def achat(self, message_history, analyzed_cv, rolling_summary=None, user_data=None, session_id=""):
+        """
+        Async version of chat. The CV summary, history trimming and vector retrieval run
+        concurrently, tokens are streamed as they arrive and the chat is logged in the background.
+        :param message_history: List of LangChain messages, the last one being the user prompt.
+        :param analyzed_cv: The CV analysis report, or None.
+        :param rolling_summary: Optional RollingSummary of this session for incremental trimming.
+        :param user_data: The user's onboarding details, used to scope semantic cache hits.
+        :param session_id: Chat session the turn is logged under.
+        :return: Async generator of response chunks.
+        """
+        if not message_history:
+            return
+        user_prompt = message_history[-1].content
+        # The CV summary does not depend on the semantic cache lookup, so both run at once
+        summary = asyncio.ensure_future(asyncio.to_thread(self._summarize_cv, analyzed_cv))
+        try:
+            vector, scope, cached = await asyncio.to_thread(
+                self._semantic_lookup, message_history, analyzed_cv, user_data)
+        except BaseException:
+            summary.cancel()
+            raise
+        if cached is not None:
+            summary.cancel()
+            for chunk in cached:
+                yield chunk
+            await asyncio.to_thread(self.chat_log.log, user_prompt, "".join(cached), session_id)
+            return
+
+        summarized_cv, trimmed_history, context_docs = await asyncio.gather(
+            summary,
+            asyncio.to_thread(self.trim_chat_history, message_history, rolling_summary),
+            asyncio.to_thread(self._retrieve_context, user_prompt, vector),
+        )
+        input_messages = self._build_input_messages(trimmed_history, summarized_cv, context_docs)
+
+        chunks = []
+        async for chunk in self.gateway.astream(self.llm, input_messages, priority=INTERACTIVE):
+            chunks.append(chunk.content)
+            yield chunk.content
+        if vector is not None:
+            self.semantic_cache.store(vector, scope, chunks)
+        # Logging happens off the request path; log() may block on a full queue, so not on the event loop
+        await asyncio.to_thread(self.chat_log.log, user_prompt, "".join(chunks), session_id)
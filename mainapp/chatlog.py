@@ -0,0 +1,74 @@
+import atexit
+import queue
+import threading
+import time
+
+
+_STOP = object()
+
+
+class ChatLogWriter:
+    def __init__(self, db, max_queue=1000, batch_size=50, flush_interval=0.2):
+        """
+        Writes chat turns to a ChatDatabase from a background thread, committing them in groups.
+        :param db: DBMS.ChatDatabase to write to.
+        :param max_queue: Maximum number of turns waiting to be written; log() blocks when the queue is full.
+        :param batch_size: Maximum number of turns committed in one transaction.
+        :param flush_interval: Seconds to wait for more turns before committing a partial batch.
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="chat-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def log(self, user_message, bot_response, session_id=""):
+        """Queue one chat turn. Returns immediately unless the queue is full (backpressure)."""
+        if not self._thread.is_alive():
+            raise RuntimeError("ChatLogWriter is closed.")
+        self._queue.put((user_message, bot_response, session_id))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write(batch)
+            for _ in range(len(batch) + stop):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch):
+        try:
+            self.db.insert_chats_bulk(batch)
+        except Exception as e:
+            print(f"Error writing chat log: {e}")
+
+    def flush(self):
+        """Block until every queued turn has been written."""
+        self._queue.join()
+
+    def close(self):
+        """Write the remaining turns and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
@@ -0,0 +1,86 @@
+import re
+
+
+CHARS_PER_TOKEN = 4  # Rough average for English text with llama-style tokenizers
+
+SECTION_HEADINGS = {
+    "profile": ("profile", "summary", "personal statement", "about me", "objective", "professional summary"),
+    "experience": ("experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history"),
+    "education": ("education", "academic background", "qualifications", "education and training"),
+    "skills": ("skills", "technical skills", "key skills", "core competencies", "competencies"),
+    "projects": ("projects", "personal projects", "key projects"),
+    "certifications": ("certifications", "certificates", "licenses", "courses", "training"),
+    "other": ("interests", "hobbies", "languages", "achievements", "awards", "references",
+              "volunteering", "publications"),
+}
+
+_HEADING_LOOKUP = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting prompts."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _heading_section(line):
+    cleaned = re.sub(r"[^a-z& ]", "", line.lower()).replace("&", "and").strip()
+    if not cleaned or len(cleaned) > 40:
+        return None
+    # "Skills and Competencies" counts as a skills heading
+    return _HEADING_LOOKUP.get(cleaned) or _HEADING_LOOKUP.get(cleaned.split(" and ")[0].strip())
+
+
+def split_sections(text):
+    """
+    Split a CV into (section, text) pairs using common headings such as "Experience" or "Skills".
+    Text before the first recognised heading is treated as the profile.
+    """
+    sections = []
+    current, lines = "profile", []
+    for line in text.splitlines():
+        section = _heading_section(line)
+        if section:
+            if any(l.strip() for l in lines):
+                sections.append((current, "\n".join(lines).strip()))
+            current, lines = section, [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((current, "\n".join(lines).strip()))
+    return sections
+
+
+def chunk_text(text, max_tokens=800):
+    """
+    Pack the lines of text into chunks of at most max_tokens (estimated).
+    Lines longer than the budget are split on word boundaries.
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        pieces = [line]
+        if len(line) > budget:
+            pieces, piece = [], ""
+            for word in line.split():
+                if piece and len(piece) + len(word) + 1 > budget:
+                    pieces.append(piece)
+                    piece = ""
+                piece = f"{piece} {word}" if piece else word
+            pieces.append(piece)
+        for piece in pieces:
+            if current and size + len(piece) + 1 > budget:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current and any(p.strip() for p in current):
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def chunk_sections(text, max_tokens=800):
+    """Split a CV into sections and each section into token-budgeted chunks: list of (section, chunk)."""
+    return [(section, chunk)
+            for section, section_text in split_sections(text)
+            for chunk in chunk_text(section_text, max_tokens)]
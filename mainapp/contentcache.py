@@ -0,0 +1,168 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def content_hash(data):
+    """
+    Return the SHA-256 hex digest of uploaded bytes or text.
+    :param data: bytes or str.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def evict_least_recent(connection, table, max_entries, max_bytes):
+    """
+    Delete the least recently used rows of a cache table until both limits are met.
+    The table needs size and accessed_at columns; the caller commits.
+    :param connection: sqlite3 connection holding the table.
+    :param table: Name of the table.
+    :param max_entries: Maximum number of rows kept.
+    :param max_bytes: Maximum total of the size column kept.
+    """
+    count, total = connection.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+    if count <= max_entries and total <= max_bytes:
+        return
+    removed_rows, removed_bytes = 0, 0
+    doomed = []
+    for rowid, size in connection.execute(f"SELECT rowid, size FROM {table} ORDER BY accessed_at ASC"):
+        if count - removed_rows <= max_entries and total - removed_bytes <= max_bytes:
+            break
+        doomed.append((rowid,))
+        removed_rows += 1
+        removed_bytes += size
+    connection.executemany(f"DELETE FROM {table} WHERE rowid = ?", doomed)
+
+
+class ContentCache:
+    def __init__(self, db_name="content_cache.db", memory_items=128, max_entries=2000,
+                 max_bytes=50 * 1024 * 1024, max_age=7 * 24 * 3600):
+        """
+        Two-tier cache keyed by content hash: an in-memory LRU in front of an SQLite table.
+        Values must be JSON serialisable.
+        :param db_name: SQLite file for the on-disk tier.
+        :param memory_items: Number of entries kept in the in-memory LRU.
+        :param max_entries: Maximum number of rows kept on disk.
+        :param max_bytes: Maximum total size of the values kept on disk.
+        :param max_age: Age in seconds after which an entry is dropped.
+        """
+        self.memory_items = memory_items
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_name, check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed_at)")
+        self.connection.commit()
+
+    def get(self, namespace, key, default=None):
+        """Return the cached value for (namespace, key), or default if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get((namespace, key))
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at <= self.max_age:
+                    self._memory.move_to_end((namespace, key))
+                    return value
+                del self._memory[(namespace, key)]
+
+            row = self.connection.execute(
+                "SELECT value, created_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return default
+            if now - row[1] > self.max_age:
+                self.connection.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (namespace, key))
+                self.connection.commit()
+                return default
+            self.connection.execute(
+                "UPDATE cache SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, namespace, key)
+            )
+            self.connection.commit()
+            value = json.loads(row[0])
+            self._remember(namespace, key, row[1], value)
+            return value
+
+    def set(self, namespace, key, value):
+        """Store a value in both tiers and evict old or excess entries from disk."""
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember(namespace, key, now, value)
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, payload, len(payload), now, now)
+            )
+            self._evict(now)
+            self.connection.commit()
+
+    def get_or_compute(self, namespace, data, compute):
+        """
+        Return the cached value for the hash of data, computing and storing it on a miss.
+        :param namespace: Kind of result (e.g., "cv_summary").
+        :param data: bytes or text the result is derived from.
+        :param compute: Zero-argument callable producing the value.
+        """
+        key = content_hash(data)
+        value = self.get(namespace, key)
+        if value is None:
+            value = compute()
+            self.set(namespace, key, value)
+        return value
+
+    def _remember(self, namespace, key, created_at, value):
+        self._memory[(namespace, key)] = (created_at, value)
+        self._memory.move_to_end((namespace, key))
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        self.connection.execute("DELETE FROM cache WHERE created_at < ?", (now - self.max_age,))
+        evict_least_recent(self.connection, "cache", self.max_entries, self.max_bytes)
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._memory.clear()
+            self.connection.execute("DELETE FROM cache")
+            self.connection.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Return the process-wide ContentCache, creating it on first use."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ContentCache()
+        return _default_cache
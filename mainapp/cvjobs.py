@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from contentcache import content_hash
+
+
+class AnalysisJob:
+    def __init__(self, job_id, filename=None):
+        """
+        State of one CV analysis, updated by the worker thread and read by the page.
+        :param job_id: Content hash of the uploaded file.
+        :param filename: Original file name.
+        """
+        self.job_id = job_id
+        self.filename = filename
+        self.state = "queued"  # queued, extracting, evaluating, merging, done or failed
+        self.progress = 0.0
+        self.partial = ""
+        self.result = None
+        self.error = None
+        self.stats = None  # StreamStats.as_dict() of the report request
+        self.created_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, state, progress, partial=None):
+        with self._lock:
+            self.state = state
+            self.progress = max(self.progress, progress)
+            if partial is not None:
+                self.partial = partial
+
+    @property
+    def finished(self):
+        return self.state in ("done", "failed")
+
+
+class AnalysisJobRunner:
+    def __init__(self, evaluator, max_workers=2, max_jobs=200):
+        """
+        Runs CV extraction and evaluation in background threads.
+        :param evaluator: EvaluationAgent used for the analysis (stream() and is_error()).
+        :param max_workers: Number of CVs analysed at the same time.
+        :param max_jobs: Number of jobs remembered; the oldest finished ones are forgotten first.
+        """
+        self.evaluator = evaluator
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cv-analysis")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, data, filename=None):
+        """
+        Start analysing a CV unless the same file is already being or has been analysed.
+        :param data: Content of the PDF or DOCX file.
+        :param filename: Original file name.
+        :return: The job ID to poll with get().
+        """
+        job_id = content_hash(data)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.state != "failed":
+                self._jobs.move_to_end(job_id)
+                return job_id
+            job = AnalysisJob(job_id, filename)
+            self._jobs[job_id] = job
+            self._forget_old_jobs()
+        self._executor.submit(self._run, job, data)
+        return job_id
+
+    def _forget_old_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def _run(self, job, data):
+        try:
+            stream = self.evaluator.stream(data, job.filename, progress=job.update)
+            result = "".join(stream)
+            job.stats = stream.stats.as_dict()
+        except Exception as e:
+            result = f"Error processing CV: {str(e)}"
+        # stream() reports failures as text; failed jobs are started again on the next submit()
+        if self.evaluator.is_error(result):
+            job.error = result
+            job.update("failed", 1.0)
+        else:
+            job.result = result
+            job.update("done", 1.0)
+        job.finished_at = time.time()
+
+    def get(self, job_id):
+        """Return the AnalysisJob for an ID, or None if it is unknown."""
+        with self._lock:
+            return self._jobs.get(job_id)
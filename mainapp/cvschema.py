@@ -0,0 +1,138 @@
+import re
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+
+# JSON schema sent to Ollama so the model can only produce this object
+CV_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "profession": {"type": "string"},
+        "years_experience": {"type": "number", "minimum": 0},
+        "summary": {"type": "string"},
+        "skills": {"type": "array", "items": {"type": "string"}},
+        "strengths": {"type": "array", "items": {"type": "string"}},
+        "weaknesses": {"type": "array", "items": {"type": "string"}},
+        "recommended_roles": {"type": "array", "items": {"type": "string"}},
+        "improvement_tips": {"type": "array", "items": {"type": "string"}},
+        "score": {"type": "integer", "minimum": 0, "maximum": 100},
+    },
+    "required": ["name", "profession", "years_experience", "summary", "skills", "strengths",
+                 "weaknesses", "recommended_roles", "improvement_tips", "score"],
+}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _text(value):
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    raise ValueError("expected a non-empty string")
+
+
+def _text_list(value):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list):
+        raise ValueError("expected a list of strings")
+    return [item.strip() for item in value if isinstance(item, str) and item.strip()]
+
+
+def _number(value):
+    if isinstance(value, bool):
+        raise ValueError("expected a number")
+    if isinstance(value, str):
+        # Models sometimes answer "85/100" or "5 years"
+        match = _NUMBER.search(value)
+        if not match:
+            raise ValueError("expected a number")
+        value = match.group()
+    number = float(value)
+    if number < 0:
+        raise ValueError("must not be negative")
+    return number
+
+
+def _score(value):
+    score = _number(value)
+    if score > 100:
+        raise ValueError("must be between 0 and 100")
+    return int(round(score))
+
+
+# Field name -> converter that returns the typed value or raises ValueError/TypeError
+VALIDATORS = {
+    "name": _text,
+    "profession": _text,
+    "years_experience": _number,
+    "summary": _text,
+    "skills": _text_list,
+    "strengths": _text_list,
+    "weaknesses": _text_list,
+    "recommended_roles": _text_list,
+    "improvement_tips": _text_list,
+    "score": _score,
+}
+
+
+def validate_fields(data):
+    """
+    Convert the fields of a decoded JSON object to their typed values.
+    :param data: Dictionary returned by the model.
+    :return: Tuple (valid, failed) of field -> value and field -> error message.
+    """
+    valid, failed = {}, {}
+    if not isinstance(data, dict) or ("error" in data and len(data) == 1):
+        error = data["error"] if isinstance(data, dict) else "expected a JSON object"
+        return valid, {name: error for name in VALIDATORS}
+    for name, convert in VALIDATORS.items():
+        if name not in data or data[name] is None:
+            failed[name] = "missing"
+            continue
+        try:
+            valid[name] = convert(data[name])
+        except (TypeError, ValueError) as e:
+            failed[name] = str(e)
+    return valid, failed
+
+
+def schema_for(fields):
+    """Return the JSON schema restricted to the given fields (used to re-ask only for failed ones)."""
+    return {
+        "type": "object",
+        "properties": {name: CV_EVALUATION_SCHEMA["properties"][name] for name in fields},
+        "required": list(fields),
+    }
+
+
+@dataclass
+class CVEvaluation:
+    score: int
+    name: str = ""
+    profession: str = ""
+    years_experience: float = 0.0
+    summary: str = ""
+    skills: List[str] = field(default_factory=list)
+    strengths: List[str] = field(default_factory=list)
+    weaknesses: List[str] = field(default_factory=list)
+    recommended_roles: List[str] = field(default_factory=list)
+    improvement_tips: List[str] = field(default_factory=list)
+    filename: Optional[str] = None
+    content_key: Optional[str] = None  # content_hash() of the CV file
+    failed_fields: List[str] = field(default_factory=list)  # Fields still invalid after retries
+
+    def __lt__(self, other):
+        # sorted() ranks evaluations from the lowest to the highest score
+        return self.score < other.score
+
+    @property
+    def complete(self):
+        return not self.failed_fields
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{key: value for key, value in data.items() if key in cls.__dataclass_fields__})
@@ -1,7 +1,11 @@
 import baseagent
-import pdfplumber
-import io
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
+from chunking import chunk_sections, estimate_tokens
+from extraction import extract_text
+from contentcache import get_default_cache, content_hash
+from llmgateway import StreamStats
+from cvschema import CVEvaluation, CV_EVALUATION_SCHEMA, VALIDATORS, schema_for, validate_fields
 
 instructions = """
 You are an advanced AI-powered CV evaluation agent. Your role is to analyze and assess the content of the CV provided.
@@ -29,34 +33,218 @@ You are an advanced AI-powered CV evaluation agent. Your role is to analyze and
 5. **Actionable Improvement Tips**
 """
 
+section_instructions = """
+You are reviewing one section of a longer CV. Only the section below is shown to you.
+Write short notes (at most 8 bullet points) on its strengths, weaknesses and missing information,
+then give the section a score out of 100 on the last line as "Section score: <number>".
+"""
+
+structured_instructions = """
+You are an AI-powered CV evaluation agent. Assess the CV provided and answer only with a JSON object:
+the candidate's name, profession, years of experience, a short summary, their skills, strengths,
+weaknesses, recommended job roles, actionable improvement tips and an overall CV score out of 100
+(90-100 excellent, 75-89 good, 50-74 average, below 50 needs improvement).
+"""
+
 name = "qwen:4b"
 
+CHUNK_THRESHOLD_TOKENS = 2500  # CVs estimated above this are evaluated section by section
+CHUNK_TOKENS = 900
+CHUNK_WORKERS = 4
+REPORT_MAX_TOKENS = 1100
+STRUCTURED_MAX_TOKENS = 800
+STRUCTURED_RETRIES = 2  # Follow-up requests for fields that failed validation
+RANK_WORKERS = 4
+ERROR_PREFIXES = ("API Error", "Error", "⚠️")  # Reports starting like this describe a failure
+
 class EvaluationAgent(baseagent.BaseAgent):
     def __init__(self):
         super().__init__(name=name, instructions=instructions)
+        self.cache = get_default_cache()
+
+    def _section_notes(self, text, progress=None):
+        # Map: evaluate every section chunk concurrently and return the notes that succeeded
+        chunks = chunk_sections(text, CHUNK_TOKENS)
+
+        def evaluate(item):
+            section, chunk = item
+            notes = self._query_ollama(f"[{section} section]\n{chunk}", temperature=0.3,
+                                       max_tokens=300, system=section_instructions)
+            return section, notes
+
+        results = [None] * len(chunks)
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as pool:
+            futures = {pool.submit(evaluate, chunk): index for index, chunk in enumerate(chunks)}
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress:
+                    partial = "\n\n".join(f"### {r[0].title()}\n{r[1]}" for r in results if r is not None)
+                    progress("evaluating", 0.2 + 0.6 * done / len(chunks), partial)
 
-    def run(self, uploaded_file):
+        notes = "\n\n".join(f"### {section.title()}\n{section_notes}" for section, section_notes in results
+                             if not section_notes.startswith(("API Error", "Error")))
+        if not notes:
+            raise RuntimeError(results[0][1] if results else "No valid response received from Ollama.")
+        return ("The CV was too long to send at once, so each section was reviewed separately. "
+                f"Section reviews:\n\n{notes}")
+
+    def _stream_chunked(self, text, progress=None, stats=None):
+        # Reduce: stream the report merged from the section notes
+        try:
+            prompt = self._section_notes(text, progress)
+        except RuntimeError as e:
+            yield str(e)
+            return
+        yield from self._stream_report(prompt, "merging", 0.85, progress, stats)
+
+    def _stream_report(self, prompt, stage, start, progress=None, stats=None):
+        # Stream the final report, reporting the text so far as the partial result
+        stream = self._stream_ollama(prompt, temperature=0.6, max_tokens=REPORT_MAX_TOKENS, stats=stats)
+        for delta in stream:
+            yield delta
+            if progress:
+                fraction = start + (0.95 - start) * min(1.0, len(stream.parts) / REPORT_MAX_TOKENS)
+                progress(stage, fraction, stream.text)
+
+    def stream(self, data, filename=None, chunked=None, progress=None):
+        """
+        Evaluate a CV given as file bytes, yielding the report as it is generated.
+        The result can be passed straight to st.write_stream().
+        :param data: Content of the PDF or DOCX file.
+        :param filename: Original file name, used to detect the format.
+        :param chunked: Force (True) or disable (False) section-by-section evaluation.
+                        By default it is used when the CV is too long for a single prompt.
+        :param progress: Optional callback progress(stage, fraction, partial_report=None).
+        :return: CompletionStream of report pieces. Its stats (time to first token, tokens/sec,
+                 total tokens) describe the request that generated the report; they stay empty
+                 when the report came from the cache.
+        """
+        stats = StreamStats()
+        return baseagent.CompletionStream(self._stream(data, filename, chunked, progress, stats), stats)
+
+    def _stream(self, data, filename, chunked, progress, stats):
         print("Running CV Evaluation...")
-        
+        report = progress or (lambda *args: None)
+
         try:
-            # Read the uploaded PDF file as bytes
-            doc = io.BytesIO(uploaded_file.getvalue())
-            text = ""
-            
-            # Use pdfplumber to extract text
-            with pdfplumber.open(doc) as pdf:
-                for page in pdf.pages:
-                    extracted_text = page.extract_text()
-                    if extracted_text:
-                        text += extracted_text + "\n"
-            
+            key = content_hash(data)
+            cached = self.cache.get("cv_evaluation", key)
+            if cached is not None:
+                yield cached
+                return
+
+            report("extracting", 0.05)
+            text = extract_text(data, filename)
+
             if not text.strip():
-                return "⚠️ No readable text found in the PDF. It might be a scanned document."
-            
+                yield "⚠️ No readable text found in the document. It might be a scanned document."
+                return
+
+            if chunked is None:
+                chunked = estimate_tokens(text) > CHUNK_THRESHOLD_TOKENS
+
             # Query AI model for CV evaluation
-            ans = self._query_ollama(text, temperature=0.6, max_tokens=1100)
-            #print(ans)
-            return ans
+            report("evaluating", 0.2)
+            if chunked:
+                pieces = self._stream_chunked(text, progress, stats)
+            else:
+                pieces = self._stream_report(text, "evaluating", 0.2, progress, stats)
+            parts = []
+            for piece in pieces:
+                parts.append(piece)
+                yield piece
+            ans = "".join(parts)
+            if not self.is_error(ans):
+                self.cache.set("cv_evaluation", key, ans)
+
+        except Exception as e:
+            yield f"Error processing CV: {str(e)}"
+
+    @staticmethod
+    def is_error(report):
+        """Return True if a report from stream()/evaluate() describes a failure instead of an evaluation."""
+        # A stream that fails midway ends with an "API Error: ..." piece
+        return not report or report.startswith(ERROR_PREFIXES) or "API Error:" in report
+
+    def evaluate(self, data, filename=None, chunked=None, progress=None):
+        """
+        Evaluate a CV given as file bytes. See stream() for the parameters.
+        :return: The evaluation report as text.
+        """
+        return "".join(self.stream(data, filename, chunked, progress))
 
+    def run(self, uploaded_file, chunked=None, stream=False):
+        """
+        Evaluate an uploaded CV.
+        :param uploaded_file: Streamlit UploadedFile (PDF or DOCX).
+        :param chunked: See stream().
+        :param stream: Return the CompletionStream of report pieces (for st.write_stream) instead of the full text.
+        :return: The evaluation report as text, or a CompletionStream of its pieces.
+        """
+        data, filename = uploaded_file.getvalue(), getattr(uploaded_file, "name", None)
+        if stream:
+            return self.stream(data, filename, chunked)
+        return self.evaluate(data, filename, chunked)
+
+    def _structured_fields(self, prompt):
+        # Ask for the whole object, then re-ask only for the fields that failed validation
+        valid, failed = validate_fields(self._query_ollama_json(
+            prompt, CV_EVALUATION_SCHEMA, max_tokens=STRUCTURED_MAX_TOKENS, system=structured_instructions))
+        for _ in range(STRUCTURED_RETRIES):
+            if not failed:
+                break
+            asked = failed
+            problems = ", ".join(f"{field} ({error})" for field, error in asked.items())
+            retry_prompt = (f"{prompt}\n\nYour previous answer had missing or invalid values for: {problems}. "
+                            "Answer again with only these fields.")
+            retried, failed = validate_fields(self._query_ollama_json(
+                retry_prompt, schema_for(asked), max_tokens=STRUCTURED_MAX_TOKENS, system=structured_instructions))
+            # validate_fields() checks every field; only the ones asked for count here
+            valid.update({field: value for field, value in retried.items() if field in asked})
+            failed = {field: error for field, error in failed.items() if field in asked}
+        return valid, sorted(failed)
+
+    def evaluate_structured(self, data, filename=None, chunked=None):
+        """
+        Evaluate a CV given as file bytes into a typed CVEvaluation (JSON output constrained by a schema).
+        Errors do not raise; they give a score of 0 with every field listed in failed_fields.
+        :param data: Content of the PDF or DOCX file.
+        :param filename: Original file name, used to detect the format.
+        :param chunked: See stream().
+        :return: CVEvaluation.
+        """
+        key = content_hash(data)
+        cached = self.cache.get("cv_evaluation_json", key)
+        if cached is not None:
+            evaluation = CVEvaluation.from_dict(cached)
+            evaluation.filename = filename
+            return evaluation
+
+        try:
+            text = extract_text(data, filename)
+            if not text.strip():
+                raise ValueError("No readable text found in the document. It might be a scanned document.")
+            if chunked is None:
+                chunked = estimate_tokens(text) > CHUNK_THRESHOLD_TOKENS
+            prompt = self._section_notes(text) if chunked else text
+            valid, failed = self._structured_fields(prompt)
         except Exception as e:
-            return f"Error processing CV: {str(e)}"
\ No newline at end of file
+            return CVEvaluation(score=0, summary=f"Error processing CV: {str(e)}", filename=filename,
+                                content_key=key, failed_fields=sorted(VALIDATORS))
+
+        evaluation = CVEvaluation(**{"score": 0, **valid}, filename=filename, content_key=key,
+                                  failed_fields=failed)
+        if evaluation.complete:
+            self.cache.set("cv_evaluation_json", key, evaluation.to_dict())
+        return evaluation
+
+    def rank(self, files, max_workers=RANK_WORKERS):
+        """
+        Evaluate many CVs and rank them by score.
+        :param files: Iterable of (data, filename) pairs.
+        :param max_workers: Number of CVs evaluated at the same time (the LLM gateway still caps requests).
+        :return: List of CVEvaluation, highest score first.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            evaluations = list(pool.map(lambda item: self.evaluate_structured(*item), files))
+        return sorted(evaluations, reverse=True)
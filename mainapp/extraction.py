@@ -0,0 +1,140 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+
+MAX_PAGES = 40  # Pages read from a PDF at most
+MAX_BYTES = 20 * 1024 * 1024  # Largest upload accepted
+MAX_CHARS = 60000  # Text returned at most
+PARALLEL_PAGE_THRESHOLD = 8  # Smaller PDFs are read in-process
+PAGES_PER_TASK = 4
+EXTRACTION_WORKERS = 2  # Worker processes reading PDF pages
+
+WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned, not forked: forking the multi-threaded app can copy locks held by other threads
+            _pool = ProcessPoolExecutor(max_workers=EXTRACTION_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _extract_pdf_pages(path, start, stop):
+    """Extract the text of pages [start, stop) of a PDF file. Runs in a worker process."""
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+
+
+def iter_pdf_pages(data, max_pages=MAX_PAGES):
+    """
+    Yield the text of each PDF page in order, as soon as it is available.
+    Large documents are split into page ranges that are extracted in a process pool; the workers
+    read the PDF from a temporary file rather than receiving a copy of it with every range.
+    :param data: PDF file content as bytes.
+    :param max_pages: Maximum number of pages to read.
+    """
+    import pdfplumber  # Only loaded once a PDF is actually read
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        page_count = min(len(pdf.pages), max_pages)
+        if page_count < PARALLEL_PAGE_THRESHOLD:
+            for page in pdf.pages[:page_count]:
+                yield page.extract_text() or ""
+            return
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as file:
+        file.write(data)
+    pool = _get_pool()
+    futures = [pool.submit(_extract_pdf_pages, file.name, start, min(start + PAGES_PER_TASK, page_count))
+               for start in range(0, page_count, PAGES_PER_TASK)]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        # Let running ranges finish before their file goes away
+        for future in futures:
+            if not future.cancelled():
+                future.exception()
+        os.remove(file.name)
+
+
+def iter_docx_paragraphs(data):
+    """
+    Yield the text of each paragraph of a DOCX file, including those inside tables.
+    :param data: DOCX file content as bytes.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    for paragraph in root.iter(f"{WORD_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{WORD_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{WORD_NS}tab":
+                parts.append("\t")
+            elif node.tag == f"{WORD_NS}br":
+                parts.append("\n")
+        yield "".join(parts)
+
+
+def detect_kind(data, filename=None):
+    """Return "pdf" or "docx" based on the file name or, failing that, the file signature."""
+    if filename:
+        lowered = filename.lower()
+        if lowered.endswith(".pdf"):
+            return "pdf"
+        if lowered.endswith(".docx"):
+            return "docx"
+    if data.startswith(b"%PDF"):
+        return "pdf"
+    if data.startswith(b"PK"):
+        return "docx"
+    raise ValueError("Unsupported file type. Please upload a PDF or DOCX file.")
+
+
+def iter_text(data, filename=None, max_pages=MAX_PAGES, max_bytes=MAX_BYTES, max_chars=MAX_CHARS):
+    """
+    Stream the text of an uploaded PDF or DOCX file piece by piece (pages or paragraphs).
+    Stops once max_chars characters have been produced.
+    :param data: File content as bytes.
+    :param filename: Original file name, used to pick the format.
+    :param max_pages: Maximum number of PDF pages to read.
+    :param max_bytes: Largest file size accepted.
+    :param max_chars: Maximum number of characters produced.
+    """
+    if len(data) > max_bytes:
+        raise ValueError(f"File is too large ({len(data)} bytes, limit is {max_bytes}).")
+
+    kind = detect_kind(data, filename)
+    pieces = iter_pdf_pages(data, max_pages) if kind == "pdf" else iter_docx_paragraphs(data)
+    remaining = max_chars
+    try:
+        for piece in pieces:
+            if not piece:
+                continue
+            if len(piece) >= remaining:
+                yield piece[:remaining]
+                return
+            remaining -= len(piece)
+            yield piece
+    finally:
+        pieces.close()
+
+
+def extract_text(data, filename=None, **limits):
+    """Return the text of an uploaded PDF or DOCX file. See iter_text() for the limits."""
+    return "\n".join(iter_text(data, filename, **limits))
@@ -0,0 +1,233 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from httpcache import HTTPCache
+
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_METHODS = frozenset({"GET", "HEAD"})
+
+
+class RateLimiter:
+    def __init__(self, rate, burst=1):
+        """
+        Token bucket limiting how many requests per second go to one host.
+        :param rate: Requests allowed per second.
+        :param burst: Number of requests that may be sent back to back.
+        """
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchEngine:
+    def __init__(self, max_workers=8, pool_size=10, timeout=10, retries=3, backoff_factor=0.5,
+                 host_rates=None, default_rate=None, http_cache=None, max_backoff=30):
+        """
+        Shared HTTP engine with one keep-alive session per host and a bounded worker pool.
+        :param max_workers: Maximum number of requests running at the same time in batch calls.
+        :param pool_size: Number of pooled connections kept open per host.
+        :param timeout: Default request timeout in seconds.
+        :param retries: How many times a failed GET is retried.
+        :param backoff_factor: Base delay for exponential backoff between retries.
+        :param host_rates: Mapping of host name to requests per second (e.g., {"www.reed.co.uk": 5}).
+        :param default_rate: Requests per second for hosts not in host_rates (None means unlimited).
+        :param http_cache: Optional HTTPCache used for GET requests.
+        :param max_backoff: Longest delay in seconds before a retry; if a server asks (Retry-After)
+                            to wait longer, its response is returned instead of retrying.
+        """
+        self.max_workers = max_workers
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.host_rates = dict(host_rates or {})
+        self.default_rate = default_rate
+        self.http_cache = http_cache
+        self._sessions = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def session_for(self, url):
+        """Return the pooled session used for the host of the given URL."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _limiter_for(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                rate = self.host_rates.get(host, self.default_rate)
+                self._limiters[host] = RateLimiter(rate) if rate else None
+            return self._limiters[host]
+
+    def _backoff(self, attempt, response=None):
+        # Retry-After is either a number of seconds or an HTTP date
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "").strip()
+            if retry_after.isdigit():
+                return float(retry_after)
+            if retry_after:
+                try:
+                    return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+
+    def request(self, method, url, cache=True, **kwargs):
+        """
+        Send a request through the pooled session for its host.
+        Idempotent requests are retried with exponential backoff on connection errors,
+        timeouts and 429/5xx responses. GET requests go through the HTTP cache when one is set.
+        :param method: HTTP method (e.g., "GET").
+        :param url: The URL to request.
+        :param cache: Set to False to bypass the HTTP cache.
+        :param kwargs: Extra arguments passed to requests (params, headers, auth, ...).
+        :return: The requests.Response of the last attempt; its from_cache attribute tells
+                 whether the body came from the HTTP cache.
+        """
+        method = method.upper()
+        kwargs.setdefault("timeout", self.timeout)
+        if self.http_cache is not None and cache and method == "GET" and not kwargs.get("stream"):
+            return self._cached_get(url, **kwargs)
+        response = self._send(method, url, **kwargs)
+        response.from_cache = False
+        return response
+
+    def _send(self, method, url, **kwargs):
+        session = self.session_for(url)
+        limiter = self._limiter_for(url)
+        attempts = self.retries + 1 if method in RETRY_METHODS else 1
+
+        for attempt in range(attempts):
+            if limiter:
+                limiter.acquire()
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < attempts - 1:
+                delay = self._backoff(attempt, response)
+                if delay > self.max_backoff:
+                    # Waiting that long would hold a pool worker; give up with the server's answer
+                    return response
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+    def _cached_get(self, url, headers=None, **kwargs):
+        # Fresh entries are served without a request; stale ones are revalidated with a conditional GET
+        prepared = requests.Request("GET", url, params=kwargs.get("params"), headers=headers,
+                                    auth=kwargs.get("auth")).prepare()
+        key = self.http_cache.key_for(prepared)
+        entry = self.http_cache.lookup(key)
+        if entry is not None and entry["fresh"]:
+            self.http_cache.record("hit")
+            return self.http_cache.to_response(entry, prepared)
+
+        headers = dict(headers or {})
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self._send("GET", url, headers=headers, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self.http_cache.record("revalidated")
+            return self.http_cache.to_response(self.http_cache.refresh(key, response) or entry, prepared)
+
+        self.http_cache.record("miss")
+        response.from_cache = False
+        if response.status_code == 200:
+            self.http_cache.store(key, response)
+        return response
+
+    def get(self, url, **kwargs):
+        """Send a GET request. See request()."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Send a POST request. See request()."""
+        return self.request("POST", url, **kwargs)
+
+    def map(self, func, items):
+        """
+        Call func on every item using the bounded worker pool.
+        :param func: Callable taking a single item.
+        :param items: Iterable of items.
+        :return: List of results in the same order as items.
+        """
+        return list(self._get_executor().map(func, items))
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) on the worker pool and return its Future."""
+        return self._get_executor().submit(func, *args, **kwargs)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="fetch")
+            return self._executor
+
+    def close(self):
+        """Shut down the worker pool and close all pooled sessions and the HTTP cache."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+        if self.http_cache is not None:
+            self.http_cache.close()
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_default_engine():
+    """Return the process-wide FetchEngine, creating it on first use."""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = FetchEngine(host_rates={"www.reed.co.uk": 5, "content.guardianapis.com": 5},
+                                          http_cache=HTTPCache())
+        return _default_engine
@@ -0,0 +1,207 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from contentcache import content_hash, evict_least_recent
+from DBMS import _configure_connection
+
+
+# URL pattern -> seconds a response is served without contacting the server
+DEFAULT_TTL_RULES = [
+    (r"reed\.co\.uk/api/1\.0/jobs/\d+", 24 * 3600),  # Job details rarely change
+    (r"reed\.co\.uk/api/1\.0/search", 15 * 60),
+    (r"api\.beta\.ons\.gov\.uk/v1/datasets", 6 * 3600),
+    (r"content\.guardianapis\.com/search", 10 * 60),
+    (r"/rss\b|/feeds?\b|feeds\.|\.xml(\?|$)", 5 * 60),  # RSS feeds change every few minutes
+]
+
+# Headers describing the transfer rather than the content; the stored body is already decoded
+_HOP_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding", "connection"})
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+ACCESS_RESOLUTION = 60  # Seconds; a hit only records its access time when the stored one is older
+
+
+class HTTPCache:
+    def __init__(self, db_name="http_cache.db", ttl_rules=DEFAULT_TTL_RULES, default_ttl=0,
+                 max_entries=5000, max_bytes=200 * 1024 * 1024, max_entry_bytes=5 * 1024 * 1024,
+                 max_stale=30 * 24 * 3600):
+        """
+        On-disk cache of GET responses with conditional revalidation (ETag / Last-Modified).
+        :param db_name: SQLite file the responses are stored in.
+        :param ttl_rules: List of (URL regex, seconds) pairs; the first match gives the freshness lifetime.
+        :param default_ttl: Lifetime for URLs matching no rule and sending no Cache-Control max-age.
+        :param max_entries: Maximum number of stored responses.
+        :param max_bytes: Maximum total size of the stored bodies; least recently used ones are evicted.
+        :param max_entry_bytes: Larger responses are not stored.
+        :param max_stale: Expired responses kept this long (seconds) for revalidation.
+        """
+        self.ttl_rules = [(re.compile(pattern), ttl) for pattern, ttl in ttl_rules]
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.max_stale = max_stale
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(db_name, check_same_thread=False)
+        _configure_connection(self.connection)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self.connection.commit()
+
+    @staticmethod
+    def key_for(prepared):
+        """Cache key of a prepared request: method, full URL (with query) and credentials."""
+        return content_hash(f"{prepared.method} {prepared.url} {prepared.headers.get('Authorization', '')}")
+
+    def ttl_for(self, url, headers):
+        """Freshness lifetime in seconds, or None if the response must not be stored."""
+        cache_control = headers.get("Cache-Control", "").lower()
+        if "no-store" in cache_control:
+            return None
+        for pattern, ttl in self.ttl_rules:
+            if pattern.search(url):
+                return ttl
+        match = _MAX_AGE.search(cache_control)
+        if match and "no-cache" not in cache_control:
+            return int(match.group(1))
+        expires = headers.get("Expires")
+        if expires:
+            try:
+                return max(0, int(parsedate_to_datetime(expires).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+        return self.default_ttl
+
+    def lookup(self, key):
+        """
+        Return the stored entry for a key as a dictionary, or None.
+        The entry has a "fresh" flag; stale entries can still be revalidated with their validators.
+        """
+        now = time.time()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT url, status, headers, body, etag, last_modified, expires_at, accessed_at "
+                "FROM responses WHERE key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            # Eviction only needs a rough order, so repeated hits do not each write
+            if now - row[7] > ACCESS_RESOLUTION:
+                self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                self.connection.commit()
+        url, status, headers, body, etag, last_modified, expires_at, _ = row
+        return {"url": url, "status": status, "headers": json.loads(headers), "body": body,
+                "etag": etag, "last_modified": last_modified, "fresh": expires_at > now}
+
+    def store(self, key, response):
+        """Store a 200 response unless it is too large or forbids caching. Returns True if stored."""
+        ttl = self.ttl_for(response.url, response.headers)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        body = response.content
+        # Without a lifetime or a validator a stored copy could never be used
+        if ttl is None or (ttl <= 0 and not etag and not last_modified) or len(body) > self.max_entry_bytes:
+            return False
+        headers = {name: value for name, value in response.headers.items() if name.lower() not in _HOP_HEADERS}
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, url, status, headers, body, etag, last_modified, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, json.dumps(headers), sqlite3.Binary(body),
+                 etag, last_modified, len(body), now + ttl, now)
+            )
+            self._evict(now)
+            self.connection.commit()
+        return True
+
+    def refresh(self, key, not_modified):
+        """Extend the lifetime of an entry after a 304 Not Modified and merge its updated headers."""
+        entry = self.lookup(key)
+        if entry is None:
+            return None
+        headers = CaseInsensitiveDict(entry["headers"])
+        headers.update({name: value for name, value in not_modified.headers.items()
+                        if name.lower() not in _HOP_HEADERS})
+        ttl = self.ttl_for(entry["url"], headers) or 0
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "UPDATE responses SET headers = ?, etag = ?, last_modified = ?, expires_at = ?, accessed_at = ? "
+                "WHERE key = ?",
+                (json.dumps(dict(headers)), headers.get("ETag"), headers.get("Last-Modified"), now + ttl, now, key)
+            )
+            self.connection.commit()
+        entry["headers"] = dict(headers)
+        return entry
+
+    def _evict(self, now):
+        self.connection.execute("DELETE FROM responses WHERE expires_at < ?", (now - self.max_stale,))
+        evict_least_recent(self.connection, "responses", self.max_entries, self.max_bytes)
+
+    @staticmethod
+    def to_response(entry, request=None):
+        """Build a requests.Response from a stored entry; its from_cache attribute is True."""
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.reason = "OK"
+        response.url = entry["url"]
+        response.headers = CaseInsensitiveDict(entry["headers"])
+        response._content = bytes(entry["body"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.request = request
+        response.from_cache = True
+        return response
+
+    def record(self, outcome):
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "revalidated":
+                self.revalidated += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """Counts of fresh hits, 304 revalidations and misses, plus the stored size."""
+        with self._lock:
+            count, total = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                    "entries": count, "bytes": total}
+
+    def clear(self):
+        """Remove every stored response."""
+        with self._lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def close(self):
+        """Close the database connection."""
+        self.connection.close()
@@ -0,0 +1,176 @@
+import hashlib
+import sqlite3
+
+from chunking import chunk_text
+
+
+def _job_document(row):
+    row_id, jobtitle, employername, location, mainsalary, maxsalary, jobdescription = row
+    text = f"{jobtitle} at {employername} ({location})\n{jobdescription or ''}"
+    metadata = {"doc_type": "job", "source_id": row_id, "title": jobtitle,
+                "employer": employername, "location": location,
+                "mainsalary": mainsalary, "maxsalary": maxsalary}
+    return text, metadata
+
+
+def _article_document(row):
+    row_id, title, published, url, content = row
+    text = f"{title}\n{content or ''}"
+    metadata = {"doc_type": "article", "source_id": row_id, "title": title,
+                "published": published, "url": url}
+    return text, metadata
+
+
+# source name -> (table, selected columns, row to (text, metadata))
+SOURCES = {
+    "job": ("jobs", "id, jobtitle, employername, location, mainsalary, maxsalary, jobdescription", _job_document),
+    "article": ("articles", "id, title, published, url, content", _article_document),
+}
+
+
+class VectorIngestor:
+    def __init__(self, vector_db, state_db="ingest_state.db", batch_size=64, chunk_tokens=400):
+        """
+        Incrementally index JobInfoDB/ArticleInfoDB rows into the Chroma vector store.
+        :param vector_db: langchain_chroma.Chroma instance (with OllamaEmbeddings as embedding function).
+        :param state_db: SQLite file holding the high-water marks and per-row content hashes.
+        :param batch_size: Rows read from SQLite and embedded per batch.
+        :param chunk_tokens: Token budget of each indexed chunk.
+        """
+        self.vector_db = vector_db
+        self.batch_size = batch_size
+        self.chunk_tokens = chunk_tokens
+        self.connection = sqlite3.connect(state_db)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS ingest_state (source TEXT PRIMARY KEY, last_version INTEGER NOT NULL)"
+        )
+        # State files from before row versions tracked row IDs, which is what the version of those rows starts at
+        if "last_id" in [row[1] for row in self.connection.execute("PRAGMA table_info(ingest_state)")]:
+            self.connection.execute("ALTER TABLE ingest_state RENAME COLUMN last_id TO last_version")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingested_rows (
+                source TEXT NOT NULL,
+                row_id INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                chunks INTEGER NOT NULL,
+                PRIMARY KEY (source, row_id)
+            )
+            """
+        )
+        self.connection.commit()
+
+    def high_water_mark(self, source):
+        """Return the highest row version of source that has been indexed."""
+        row = self.connection.execute("SELECT last_version FROM ingest_state WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else 0
+
+    def _iter_batches(self, db_connection, source, after_version):
+        # Rows are read in version order; inserts and edits both move a row past the watermark
+        table, columns, _ = SOURCES[source]
+        while True:
+            rows = db_connection.execute(
+                f"SELECT {columns}, version FROM {table} WHERE version > ? ORDER BY version LIMIT ?",
+                (after_version, self.batch_size)
+            ).fetchall()
+            if not rows:
+                return
+            after_version = rows[-1][-1]
+            yield [row[:-1] for row in rows], after_version
+
+    def ingest(self, db, source, rescan=False):
+        """
+        Index rows of one source inserted or changed since the last run (tracked by row version);
+        only rows whose content changed are re-embedded. With rescan=True every row is checked again
+        and rows deleted from SQLite are removed from Chroma.
+        :param db: JobInfoDB (source "job") or ArticleInfoDB (source "article").
+        :param source: "job" or "article".
+        :param rescan: Check all rows instead of only those past the version high-water mark.
+        :return: Number of rows (re-)embedded.
+        """
+        to_document = SOURCES[source][2]
+        start = 0 if rescan else self.high_water_mark(source)
+        seen, embedded = set(), 0
+
+        for rows, last_version in self._iter_batches(db.connection, source, start):
+            ids = [row[0] for row in rows]
+            seen.update(ids)
+            placeholders = ",".join("?" * len(ids))
+            known = {
+                row_id: (content_hash, chunks) for row_id, content_hash, chunks in self.connection.execute(
+                    f"SELECT row_id, content_hash, chunks FROM ingested_rows WHERE source = ? AND row_id IN ({placeholders})",
+                    (source, *ids)
+                )
+            }
+
+            texts, metadatas, chunk_ids, stale_ids, ledger = [], [], [], [], []
+            for row in rows:
+                text, metadata = to_document(row)
+                content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+                previous_hash, previous_chunks = known.get(row[0], (None, 0))
+                if previous_hash == content_hash:
+                    continue
+                metadata = {key: value for key, value in metadata.items() if value is not None}
+                chunks = chunk_text(text, self.chunk_tokens)
+                for index, chunk in enumerate(chunks):
+                    texts.append(chunk)
+                    metadatas.append({**metadata, "chunk": index})
+                    chunk_ids.append(f"{source}:{row[0]}:{index}")
+                stale_ids.extend(f"{source}:{row[0]}:{index}" for index in range(len(chunks), previous_chunks))
+                ledger.append((source, row[0], content_hash, len(chunks)))
+
+            if texts:
+                # add_texts embeds the whole batch in one call and upserts by ID
+                self.vector_db.add_texts(texts, metadatas=metadatas, ids=chunk_ids)
+            if stale_ids:
+                self.vector_db.delete(ids=stale_ids)
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO ingested_rows (source, row_id, content_hash, chunks) VALUES (?, ?, ?, ?)",
+                ledger
+            )
+            self.connection.execute(
+                "INSERT INTO ingest_state (source, last_version) VALUES (?, ?) "
+                "ON CONFLICT(source) DO UPDATE SET last_version = MAX(last_version, excluded.last_version)",
+                (source, last_version)
+            )
+            self.connection.commit()
+            embedded += len(ledger)
+
+        if rescan:
+            self._remove_deleted(source, seen)
+        return embedded
+
+    def _remove_deleted(self, source, seen):
+        gone = [(row_id, chunks) for row_id, chunks in self.connection.execute(
+            "SELECT row_id, chunks FROM ingested_rows WHERE source = ?", (source,)) if row_id not in seen]
+        if not gone:
+            return
+        self.vector_db.delete(ids=[f"{source}:{row_id}:{index}" for row_id, chunks in gone for index in range(chunks)])
+        self.connection.executemany("DELETE FROM ingested_rows WHERE source = ? AND row_id = ?",
+                                    [(source, row_id) for row_id, _ in gone])
+        self.connection.commit()
+
+    def ingest_jobs(self, job_db, rescan=False):
+        """Index rows of JobInfoDB.jobs. See ingest()."""
+        return self.ingest(job_db, "job", rescan)
+
+    def ingest_articles(self, article_db, rescan=False):
+        """Index rows of ArticleInfoDB.articles. See ingest()."""
+        return self.ingest(article_db, "article", rescan)
+
+    def close(self):
+        """Close the state database connection."""
+        self.connection.close()
+
+
+# Example usage
+if __name__ == "__main__":
+    from langchain_chroma import Chroma
+    from langchain_ollama import OllamaEmbeddings
+    import DBMS
+
+    vector_db = Chroma(persist_directory="chroma_db", embedding_function=OllamaEmbeddings(model="nomic-embed-text"))
+    ingestor = VectorIngestor(vector_db)
+    print("Jobs embedded:", ingestor.ingest_jobs(DBMS.JobInfoDB()))
+    print("Articles embedded:", ingestor.ingest_articles(DBMS.ArticleInfoDB()))
+    ingestor.close()
@@ -0,0 +1,244 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+INTERACTIVE = 0  # Chat turns a user is waiting on
+BACKGROUND = 10  # CV evaluation and other batch work
+
+
+class PriorityLimiter:
+    def __init__(self, max_in_flight):
+        """
+        Caps concurrent requests; waiting callers are admitted by priority, then arrival order.
+        :param max_in_flight: Maximum number of requests running at the same time.
+        """
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._waiting = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(self, priority=BACKGROUND):
+        entry = (priority, next(self._counter))
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            while self._waiting[0] != entry or self.in_flight >= self.max_in_flight:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            # The next waiter may also fit
+            self._condition.notify_all()
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    @property
+    def queue_depth(self):
+        return len(self._waiting)
+
+
+class StreamStats:
+    def __init__(self):
+        """Timing of one streamed completion, filled in while it is consumed."""
+        self.queued_at = time.perf_counter()
+        self.started_at = None  # Slot acquired, request sent
+        self.first_token_at = None
+        self.finished_at = None
+        self.total_tokens = 0  # Completion tokens (usage if reported, otherwise content chunks)
+
+    @property
+    def time_to_first_token(self):
+        """Seconds from the call to the first content delta, including queue wait."""
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.queued_at
+
+    @property
+    def tokens_per_second(self):
+        """Generation speed after the first token."""
+        if self.first_token_at is None or self.finished_at is None or self.total_tokens < 2:
+            return None
+        elapsed = self.finished_at - self.first_token_at
+        return (self.total_tokens - 1) / elapsed if elapsed > 0 else None
+
+    def as_dict(self):
+        return {
+            "ttft": self.time_to_first_token,
+            "tokens_per_sec": self.tokens_per_second,
+            "total_tokens": self.total_tokens,
+            "duration": (self.finished_at - self.queued_at) if self.finished_at else None,
+        }
+
+
+class LLMGateway:
+    def __init__(self, base_url="http://localhost:11434", max_in_flight=2, history=500):
+        """
+        Single entry point to the local Ollama server shared by every agent in the process.
+        :param base_url: Ollama server URL.
+        :param max_in_flight: Maximum number of generations sent to Ollama at the same time.
+        :param history: Number of recent requests kept for latency metrics.
+        """
+        self.base_url = base_url
+        self.limiter = PriorityLimiter(max_in_flight)
+        self._client = None
+        self._chat_models = {}
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=history)
+        self._waits = deque(maxlen=history)
+        self._ttfts = deque(maxlen=history)
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def client(self):
+        """One OpenAI-compatible client (and its keep-alive connection pool) for all agents."""
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(base_url=f"{self.base_url}/v1", api_key="ollama")
+            return self._client
+
+    def chat_model(self, **kwargs):
+        """Return a shared ChatOllama instance for the given settings (e.g., model="llama3")."""
+        key = tuple(sorted(kwargs.items()))
+        with self._lock:
+            if key not in self._chat_models:
+                from langchain_ollama import ChatOllama
+                self._chat_models[key] = ChatOllama(base_url=self.base_url, **kwargs)
+            return self._chat_models[key]
+
+    def _record(self, wait, latency, failed):
+        with self._lock:
+            self.requests += 1
+            self.errors += failed
+            self._waits.append(wait)
+            self._latencies.append(latency)
+
+    @contextmanager
+    def slot(self, priority=BACKGROUND):
+        """Hold one of the in-flight slots for the duration of the block."""
+        queued = time.perf_counter()
+        self.limiter.acquire(priority)
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield
+            failed = False
+        finally:
+            self.limiter.release()
+            self._record(started - queued, time.perf_counter() - started, failed)
+
+    def complete(self, priority=BACKGROUND, **kwargs):
+        """Run client.chat.completions.create inside a slot."""
+        with self.slot(priority):
+            return self.client.chat.completions.create(**kwargs)
+
+    def stream_complete(self, priority=BACKGROUND, stats=None, **kwargs):
+        """
+        Streaming version of complete(): yield the text deltas of a chat completion as they arrive.
+        :param priority: Queue priority.
+        :param stats: Optional StreamStats filled in with time to first token, tokens/sec and token count.
+        """
+        stats = stats or StreamStats()
+        stats.queued_at = time.perf_counter()
+        chunks = 0
+        with self.slot(priority):
+            stats.started_at = time.perf_counter()
+            response = self.client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **kwargs)
+            try:
+                for chunk in response:
+                    if getattr(chunk, "usage", None) and chunk.usage.completion_tokens:
+                        stats.total_tokens = chunk.usage.completion_tokens
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if not delta:
+                        continue
+                    if stats.first_token_at is None:
+                        stats.first_token_at = time.perf_counter()
+                        with self._lock:
+                            self._ttfts.append(stats.time_to_first_token)
+                    chunks += 1
+                    yield delta
+            finally:
+                response.close()
+                stats.finished_at = time.perf_counter()
+                stats.total_tokens = stats.total_tokens or chunks
+
+    def stream(self, llm, messages, priority=INTERACTIVE):
+        """Stream chunks from a LangChain chat model while holding a slot."""
+        with self.slot(priority):
+            yield from llm.stream(messages)
+
+    async def astream(self, llm, messages, priority=INTERACTIVE):
+        """Async version of stream()."""
+        queued = time.perf_counter()
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.limiter.acquire, priority))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The worker thread may still get the slot; give it back once it does
+            acquiring.add_done_callback(
+                lambda future: future.cancelled() or future.exception() or self.limiter.release())
+            raise
+        started = time.perf_counter()
+        failed = True
+        try:
+            async for chunk in llm.astream(messages):
+                yield chunk
+            failed = False
+        finally:
+            self.limiter.release()
+            self._record(started - queued, time.perf_counter() - started, failed)
+
+    def metrics(self):
+        """
+        Snapshot of gateway load.
+        :return: Dictionary with queue depth, in-flight count, request/error totals and
+                 p50/p95 latency, queue wait and time to first streamed token (seconds)
+                 over recent requests.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            waits = sorted(self._waits)
+            ttfts = sorted(self._ttfts)
+            requests, errors = self.requests, self.errors
+
+        def percentile(values, fraction):
+            if not values:
+                return 0.0
+            return values[min(len(values) - 1, int(len(values) * fraction))]
+
+        return {
+            "queue_depth": self.limiter.queue_depth,
+            "in_flight": self.limiter.in_flight,
+            "requests": requests,
+            "errors": errors,
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p95": percentile(latencies, 0.95),
+            "wait_p50": percentile(waits, 0.5),
+            "wait_p95": percentile(waits, 0.95),
+            "ttft_p50": percentile(ttfts, 0.5),
+            "ttft_p95": percentile(ttfts, 0.95),
+        }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Return the process-wide LLMGateway, creating it on first use."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
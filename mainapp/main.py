@@ -1,16 +1,28 @@
+import time
+import uuid
 import streamlit as st
-import chatbotagent
-import evaulationagent  # Fixed typo
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
 # Set Streamlit Page Config
 st.set_page_config(page_title="AI Job Assistant", layout="wide")
 
 # Initialize Agents
+# Streamlit re-runs this script on every interaction; the agents are built once per process
+# and shared by all sessions. Heavy modules are only imported by the page that needs them.
 
+@st.cache_resource
+def get_chatbot():
+    import chatbotagent
+    return chatbotagent.ChatbotAgent(model="llama3")
 
-chatbot = chatbotagent.ChatbotAgent(model="llama3")
-evaluator = evaulationagent.EvaluationAgent()
+@st.cache_resource
+def get_evaluator():
+    import evaulationagent  # Fixed typo
+    return evaulationagent.EvaluationAgent()
+
+@st.cache_resource
+def get_job_runner():
+    import cvjobs
+    return cvjobs.AnalysisJobRunner(get_evaluator())
 
 # --- Initialize Session State ---
 if "stage" not in st.session_state:
@@ -24,9 +36,10 @@ if "cv_analysis_result" not in st.session_state:
     st.session_state.cv_analysis_result = None  # Stores analyzed CV report
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []  # Stores chatbot messages
-if "message_hist" not in st.session_state:
-    st.session_state.message_hist = []
-    st.session_state.message_hist.append(SystemMessage("You are a bot designed to help users for job related recommendation and suggestions"))
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if "cv_job_id" not in st.session_state:
+    st.session_state.cv_job_id = None  # Background CV analysis being polled
 
 # --- Onboarding Section ---
 
@@ -43,13 +56,38 @@ def change_tocv_stage(name,location,job_interest,experience_level):
             st.warning("Please fill in all the required fields!")
 
 def cv_analysis():
-    st.title("CV Analysis Report")
-    st.session_state.cv_analysis_result = evaluator.run(st.session_state.uploaded_file)
-    if st.session_state.cv_analysis_result:
+    # Runs in the background; the report page polls the job until it is done
+    uploaded_file = st.session_state.uploaded_file
+    st.session_state.cv_job_id = get_job_runner().submit(uploaded_file.getvalue(), getattr(uploaded_file, "name", None))
+    st.session_state.cv_analysis_result = None
+
+def current_cv_analysis():
+    # The report page is not the only reader: a job that finished while the user was chatting counts too
+    if st.session_state.cv_analysis_result is None and st.session_state.cv_job_id is not None:
+        job = get_job_runner().get(st.session_state.cv_job_id)
+        if job is not None and job.state == "done":
+            st.session_state.cv_analysis_result = job.result
+    return st.session_state.cv_analysis_result
+
+def show_cv_analysis():
+    job = get_job_runner().get(st.session_state.cv_job_id)
+    if job is None:
+        return
+    if job.state == "failed":
+            st.error(job.error)
+    elif job.state == "done":
+            st.session_state.cv_analysis_result = job.result
             st.success("Here is your CV Analysis Report:")
-            st.write(st.session_state.cv_analysis_result)
+            st.write(job.result)
+            if job.stats and job.stats["ttft"] is not None:
+                st.caption(f"{job.stats['total_tokens']} tokens, first token after {job.stats['ttft']:.1f}s, "
+                           f"{job.stats['tokens_per_sec'] or 0:.1f} tokens/s")
     else:
-            st.warning("Your CV is still being analyzed. Please wait.")
+            st.progress(job.progress, text=f"Your CV is being analyzed ({job.state})...")
+            if job.partial:
+                st.write(job.partial)
+            time.sleep(1)
+            st.rerun()
 
 if st.session_state.stage == "onboarding":
     st.title("Welcome to AI Job Assistant")
@@ -92,6 +130,15 @@ if st.session_state.stage == "main":
     st.sidebar.text(f"Interest: {st.session_state.user_data.get('job_interest', 'Unknown')}")
 
     if nav_option == "Chatbot":
+        import chatbotagent
+        from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+        if "message_hist" not in st.session_state:
+            st.session_state.message_hist = []
+            st.session_state.message_hist.append(SystemMessage("You are a bot designed to help users for job related recommendation and suggestions"))
+        if "rolling_summary" not in st.session_state:
+            st.session_state.rolling_summary = chatbotagent.RollingSummary()
+
         st.title("AI Job Assistant Chatbot")
 
         # Show Chat History
@@ -110,7 +157,7 @@ if st.session_state.stage == "main":
 
             with st.chat_message("assistant"):
                 response_container = st.empty()
-                response_generator = chatbot.chat(st.session_state.message_hist,st.session_state.cv_analysis_result)
+                response_generator = get_chatbot().chat(st.session_state.message_hist,current_cv_analysis(),st.session_state.rolling_summary,st.session_state.user_data,st.session_state.session_id)
 
             # Stream output in real time
                 streamed_response = st.write_stream(response_generator)
@@ -120,9 +167,12 @@ if st.session_state.stage == "main":
             st.session_state.chat_history.append({"role": "assistant", "content": streamed_response})
 
     if nav_option == "CV Analysis Report":
-        st.button("Analyze?",on_click=cv_analysis)
+        st.title("CV Analysis Report")
         if not st.session_state.cv_uploaded:
             st.warning("You have not uploaded a CV. Please upload one in the sidebar.")
+        else:
+            st.button("Analyze?",on_click=cv_analysis)
+            show_cv_analysis()
         
 
 st.markdown("---")
@@ -1,12 +1,93 @@
+import math
+import re
+from collections import deque
 import requests
 from requests.auth import HTTPBasicAuth
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
 import json
+from fetcher import get_default_engine
+
+
+ARTICLE_MAX_BYTES = 2 * 1024 * 1024  # Bytes of an article page downloaded at most
+ARTICLE_MAX_CHARS = 20000  # Characters of article text kept at most
+ARTICLE_MIN_PARAGRAPH = 40  # Outside <article>, shorter paragraphs are mostly captions, bylines and buttons
+BOILERPLATE_MAX_CHARS = 200  # Longer paragraphs are always kept
+
+# Whole paragraphs that are site furniture rather than article text (matched against the full paragraph)
+BOILERPLATE = re.compile(
+    r"""(?:
+        (?:subscribe|sign\ up|register)(?:\ (?:now|today|for\ free))?
+            (?:\ (?:to|for)\ (?:our|the)\ (?:\w+\ )?newsletters?)?
+      | (?:we\ use|this\ (?:site|website)\ uses)\ cookies\b.*
+      | accept\ (?:all\ )?cookies
+      | (?:©|\(c\)|copyright\ ?©?)\ ?\d{4}\b.*
+      | all\ rights\ reserved
+      | advertisement
+      | follow\ us(?:\ on\ \w+)?
+      | share\ this(?:\ (?:article|story|page))?
+      | read\ more
+      | (?:terms\ of\ (?:use|service)|privacy\ policy)(?:\ [|·]\ .*)?
+    )[.!:]?""",
+    re.IGNORECASE | re.VERBOSE
+)
+
+
+def _is_boilerplate(text):
+    return len(text) <= BOILERPLATE_MAX_CHARS and BOILERPLATE.fullmatch(text) is not None
+
+
+def _read_capped(response, max_bytes):
+    """Read a streamed response body, stopping after max_bytes."""
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            body += chunk
+            if len(body) >= max_bytes:
+                break
+    finally:
+        response.close()
+    return bytes(body[:max_bytes])
+
+
+def extract_article_text(html, max_chars=ARTICLE_MAX_CHARS):
+    """
+    Extract the article text of an HTML page.
+    Only <article> and <p> elements are parsed; paragraphs inside <article> are preferred when present.
+    Repeated paragraphs and short ones that consist of a boilerplate phrase (cookie notices, newsletter
+    prompts, copyright lines) are skipped; without an <article>, short paragraphs are skipped as well.
+    Extraction stops once max_chars is reached.
+    :param html: Page content as bytes or text (may be truncated).
+    :param max_chars: Maximum number of characters returned.
+    :return: The paragraphs joined by newlines (empty if none were found).
+    """
+    strainer = SoupStrainer(["article", "p"])
+    try:
+        soup = BeautifulSoup(html, "lxml", parse_only=strainer)
+    except FeatureNotFound:
+        soup = BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+    articles = soup.find_all("article")
+    paragraphs = (p for article in articles for p in article.find_all("p")) if articles else soup.find_all("p")
+    parts, seen, total = [], set(), 0
+    for p in paragraphs:
+        text = p.get_text(" ", strip=True)
+        if not text or text in seen or _is_boilerplate(text):
+            continue
+        if not articles and len(text) < ARTICLE_MIN_PARAGRAPH:
+            continue
+        seen.add(text)
+        if total + len(text) >= max_chars:
+            parts.append(text[:max_chars - total])
+            break
+        parts.append(text)
+        total += len(text) + 1
+    return "\n".join(parts)
 
 
 class APIS:
-    def __init__(self):
-        self.KEYS = json.load(open(r"C:\Users\adity\Desktop\luck\project\mainapp\API.json"))
+    def __init__(self, keys_path=r"C:\Users\adity\Desktop\luck\project\mainapp\API.json", engine=None):
+        self.KEYS = json.load(open(keys_path))
+        self.engine = engine or get_default_engine()
         # Job API details
         self.JOB_BASE_URL = "https://www.reed.co.uk/api/1.0"
         self.JOB_API_KEY = self.KEYS["API_reed"]
@@ -18,7 +99,8 @@ class APIS:
         # ONS API details
         self.ONS_BASE_URL = "https://api.beta.ons.gov.uk/v1"
 
-    def search_jobs(self, keywords, location=None, distance=10, min_salary=None, max_salary=None, page=1):
+    def search_jobs(self, keywords, location=None, distance=10, min_salary=None, max_salary=None, page=1,
+                    results_per_page=20, skip=None):
         """
         Search for jobs on Reed API.
         :param keywords: Job keywords (e.g., "Software Engineer").
@@ -27,6 +109,8 @@ class APIS:
         :param min_salary: Minimum salary filter.
         :param max_salary: Maximum salary filter.
         :param page: Page number for pagination (default is 1).
+        :param results_per_page: Number of jobs per page (Reed allows at most 100).
+        :param skip: Number of jobs skipped (default is (page - 1) * results_per_page).
         :return: List of jobs with IDs and basic details.
         """
         endpoint = f"{self.JOB_BASE_URL}/search"
@@ -36,17 +120,84 @@ class APIS:
             "distanceFromLocation": distance,
             "minimumSalary": min_salary,
             "maximumSalary": max_salary,
-            "resultsToTake": 20,
-            "resultsToSkip": (page - 1) * 100
+            "resultsToTake": results_per_page,
+            "resultsToSkip": skip if skip is not None else (page - 1) * results_per_page
         }
         try:
-            response = requests.get(endpoint, params=params, auth=HTTPBasicAuth(self.JOB_API_KEY, ""))
+            response = self.engine.get(endpoint, params=params, auth=HTTPBasicAuth(self.JOB_API_KEY, ""))
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error fetching jobs: {e}")
             return None
 
+    def iter_jobs(self, keywords, location=None, distance=10, min_salary=None, max_salary=None,
+                  limit=None, page_size=100, prefetch=2, details=False):
+        """
+        Iterate over every job of a Reed search, fetching the following pages in the background.
+        Only the pages needed for the total (or limit) are requested, and the last one only asks
+        for the jobs still missing.
+        :param keywords: Job keywords (e.g., "Software Engineer").
+        :param location: Job location (e.g., "London").
+        :param distance: Distance from location in miles (default is 10).
+        :param min_salary: Minimum salary filter.
+        :param max_salary: Maximum salary filter.
+        :param limit: Maximum number of jobs yielded (default is all of them).
+        :param page_size: Number of jobs per request (Reed allows at most 100).
+        :param prefetch: Number of pages requested ahead of the one being consumed.
+        :param details: Also fetch get_job_details() for every job, concurrently per page, and merge it in.
+        :return: Generator of job dictionaries.
+        """
+        page_size = max(1, min(page_size, 100))
+        wanted = limit if limit is not None else math.inf
+        if wanted <= 0:
+            return
+
+        def fetch(page, take):
+            # A short last page keeps the regular offset and only asks for the jobs still missing
+            return self.search_jobs(keywords, location, distance, min_salary, max_salary,
+                                    results_per_page=take, skip=(page - 1) * page_size)
+
+        first = fetch(1, page_size if wanted >= page_size else int(wanted))
+        if not first:
+            return
+        total = min(first.get("totalResults", 0), wanted)
+        last_page = math.ceil(total / page_size) if total else 1
+
+        def take_for(page):
+            return int(min(page_size, total - (page - 1) * page_size))
+
+        pending = deque()
+        next_page = 2
+        yielded = 0
+        seen = set()
+        data = first
+        try:
+            while True:
+                # Keep up to prefetch pages in flight while this one is consumed
+                while next_page <= last_page and len(pending) < prefetch:
+                    pending.append(self.engine.submit(fetch, next_page, take_for(next_page)))
+                    next_page += 1
+
+                hits = [hit for hit in data.get("results", []) if hit.get("jobId") not in seen]
+                seen.update(hit.get("jobId") for hit in hits)
+                hits = hits[:int(min(len(hits), wanted - yielded))]
+                if details and hits:
+                    job_details = self.get_jobs_details([hit["jobId"] for hit in hits])
+                    hits = [dict(hit, **detail) if detail else hit for hit, detail in zip(hits, job_details)]
+                for hit in hits:
+                    yield hit
+                    yielded += 1
+
+                if yielded >= wanted or not pending:
+                    return
+                data = pending.popleft().result()
+                if not data or not data.get("results"):
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+
     def get_job_details(self, job_id):
         """
         Get full job details for a specific job ID.
@@ -55,13 +206,21 @@ class APIS:
         """
         endpoint = f"{self.JOB_BASE_URL}/jobs/{job_id}"
         try:
-            response = requests.get(endpoint, auth=HTTPBasicAuth(self.JOB_API_KEY, ""))
+            response = self.engine.get(endpoint, auth=HTTPBasicAuth(self.JOB_API_KEY, ""))
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error fetching job details: {e}")
             return None
 
+    def get_jobs_details(self, job_ids):
+        """
+        Get full job details for many job IDs concurrently.
+        :param job_ids: Iterable of Reed job IDs.
+        :return: A list of job detail dictionaries (None for failed lookups), in the order of job_ids.
+        """
+        return self.engine.map(self.get_job_details, job_ids)
+
     import requests
 
     def get_news_api_article(self, endpoint="latest-news", query_params=None):
@@ -88,7 +247,7 @@ class APIS:
 
         try:
         # Make the API request
-            response = requests.get(url, headers=headers, params=query_params)
+            response = self.engine.get(url, headers=headers, params=query_params)
             response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
     
         # Parse the JSON response
@@ -119,7 +278,7 @@ class APIS:
             "offset": offset
         }
         try:
-            response = requests.get(endpoint, params=params)
+            response = self.engine.get(endpoint, params=params)
             response.raise_for_status()
             return response.json().get("items", [])
         except requests.exceptions.RequestException as e:
@@ -146,32 +305,42 @@ class APIS:
             "dimensions": dimensions
         }
         try:
-            response = requests.post(endpoint, json=payload)
+            response = self.engine.post(endpoint, json=payload)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error filtering ONS dataset: {e}")
             return None
-    def _extract_article_content(self, url):
+    def _extract_article_content(self, url, max_bytes=ARTICLE_MAX_BYTES, max_chars=ARTICLE_MAX_CHARS):
         """
         Extract full article content from a URL using web scraping.
 
         :param url: The URL of the article to scrape.
+        :param max_bytes: Maximum number of bytes of the page downloaded.
+        :param max_chars: Maximum number of characters of text returned.
         :return: Extracted text content of the article or a fallback message if extraction fails.
         """
         try:
-            response = requests.get(url, timeout=10)
+            response = self.engine.get(url, timeout=10, stream=True)
             response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Example: Extract paragraphs
-            paragraphs = soup.find_all('p')
-            full_content = "\n".join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)])
+            if "html" not in response.headers.get("Content-Type", "text/html"):
+                response.close()
+                return "Content could not be extracted."
+            full_content = extract_article_text(_read_capped(response, max_bytes), max_chars)
             return full_content or "Content could not be extracted."
         except requests.exceptions.RequestException as e:
             print(f"Error fetching article content from {url}: {e}")
             return "Failed to retrieve content."
+
+    def extract_articles_content(self, urls, max_bytes=ARTICLE_MAX_BYTES, max_chars=ARTICLE_MAX_CHARS):
+        """
+        Extract the content of many articles concurrently.
+
+        :param urls: Iterable of article URLs.
+        :return: A list of extracted texts (or fallback messages), in the order of urls.
+        """
+        return self.engine.map(lambda url: self._extract_article_content(url, max_bytes, max_chars), urls)
+
     def get_guardian_articles_with_content(self, keyword):
         api_key = self.KEYS['Guardian_API']  # Replace with your API key
         base_url = "https://content.guardianapis.com/search"
@@ -184,7 +353,7 @@ class APIS:
         }
 
         try:
-            response = requests.get(base_url, params=params)
+            response = self.engine.get(base_url, params=params)
             response.raise_for_status()  # Raise error for bad status
             data = response.json()
 
@@ -206,7 +375,8 @@ class APIS:
 
 
 class RSSFetcher:
-    def __init__(self):
+    def __init__(self, engine=None):
+        self.engine = engine or get_default_engine()
         # Example RSS feed URLs
         self.RSS_FEEDS = [
             "https://rss.nytimes.com/services/xml/rss/nyt/Technology.xml",  # Technology news
@@ -214,36 +384,57 @@ class RSSFetcher:
             "https://feeds.bbci.co.uk/news/technology/rss.xml"  # Technology from BBC
         ]
 
+    def parse_rss_articles(self, content):
+        """
+        Parse the items of an RSS document.
+
+        :param content: RSS XML as bytes or text.
+        :return: A list of dictionaries containing article details (guid, title, link, description, pub_date).
+        """
+        soup = BeautifulSoup(content, "xml")
+        articles = []
+        for item in soup.find_all("item"):
+            title = item.title.text if item.title else "No Title"
+            link = item.link.text if item.link else "No Link"
+            description = item.description.text if item.description else "No Description"
+            pub_date = item.pubDate.text if item.pubDate else "No Publication Date"
+            # Feeds without a <guid> identify items by their link
+            guid = item.guid.text.strip() if item.guid and item.guid.text.strip() else link
+
+            articles.append({
+                "guid": guid,
+                "title": title,
+                "link": link,
+                "description": description,
+                "pub_date": pub_date
+            })
+        return articles
+
     def fetch_rss_articles(self, feed_url):
         """
         Fetch and parse articles from an RSS feed.
         
         :param feed_url: The URL of the RSS feed.
-        :return: A list of dictionaries containing article details (title, link, description).
+        :return: A list of dictionaries containing article details (guid, title, link, description, pub_date).
         """
         try:
-            response = requests.get(feed_url)
+            response = self.engine.get(feed_url)
             response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, "xml")
-            articles = []
-            for item in soup.find_all("item"):
-                title = item.title.text if item.title else "No Title"
-                link = item.link.text if item.link else "No Link"
-                description = item.description.text if item.description else "No Description"
-                pub_date = item.pubDate.text if item.pubDate else "No Publication Date"
-
-                articles.append({
-                    "title": title,
-                    "link": link,
-                    "description": description,
-                    "pub_date": pub_date
-                })
-            return articles
+            return self.parse_rss_articles(response.content)
         except requests.exceptions.RequestException as e:
             print(f"Error fetching RSS feed: {e}")
             return []
 
+    def fetch_all_rss_articles(self, feed_urls=None):
+        """
+        Fetch several RSS feeds concurrently.
+
+        :param feed_urls: Feed URLs to fetch (default is RSS_FEEDS).
+        :return: A dictionary mapping each feed URL to its list of articles.
+        """
+        feed_urls = list(feed_urls or self.RSS_FEEDS)
+        return dict(zip(feed_urls, self.engine.map(self.fetch_rss_articles, feed_urls)))
+
 
 
 # # Example usage
@@ -0,0 +1,103 @@
+from chunking import estimate_tokens, CHARS_PER_TOKEN
+
+
+def build_where(filters):
+    """
+    Turn simple metadata filters into a Chroma where clause.
+    :param filters: Mapping of metadata field to a value or a list of accepted values
+                    (e.g., {"doc_type": "job", "location": ["London", "Leeds"]}).
+    :return: Chroma where dictionary, or None when there is nothing to filter on.
+    """
+    clauses = []
+    for field, value in (filters or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            clauses.append({field: {"$in": list(value)}})
+        else:
+            clauses.append({field: value})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+# Chroma distance -> cosine similarity for normalised embeddings, by the collection's hnsw:space
+_SIMILARITY = {
+    "l2": lambda distance: 1.0 - distance / 2.0,  # Chroma reports the squared L2 distance
+    "cosine": lambda distance: 1.0 - distance,
+    "ip": lambda distance: 1.0 - distance,
+}
+
+
+def _doc_key(doc):
+    return getattr(doc, "id", None) or (doc.page_content, tuple(sorted((doc.metadata or {}).items())))
+
+
+class ContextRetriever:
+    def __init__(self, vector_db, embeddings, k=4, fetch_k=20, use_mmr=True, lambda_mult=0.5,
+                 score_threshold=0.3, filters=None, max_context_tokens=1200, space="l2"):
+        """
+        Retrieval layer over the Chroma store, created once per agent.
+        :param vector_db: langchain_chroma.Chroma instance.
+        :param embeddings: Embeddings used for the store (to embed queries).
+        :param k: Number of documents returned.
+        :param fetch_k: Number of nearest neighbours fetched before the score cutoff and MMR.
+        :param use_mmr: Diversify the results with maximal marginal relevance.
+        :param lambda_mult: MMR trade-off between relevance (1.0) and diversity (0.0).
+        :param score_threshold: Minimum cosine similarity to the query (None disables the cutoff).
+        :param filters: Default metadata filters, see build_where().
+        :param max_context_tokens: Token budget for the formatted context.
+        :param space: Distance function of the Chroma collection ("l2", the Chroma default, "cosine" or "ip").
+        """
+        self.vector_db = vector_db
+        self.embeddings = embeddings
+        self.k = k
+        self.fetch_k = fetch_k
+        self.use_mmr = use_mmr
+        self.lambda_mult = lambda_mult
+        self.score_threshold = score_threshold
+        self.filters = dict(filters or {})
+        self.max_context_tokens = max_context_tokens
+        self.similarity = _SIMILARITY[space]
+
+    def retrieve(self, query, query_vector=None, filters=None):
+        """
+        Return the most useful documents for a query.
+        :param query: The user prompt.
+        :param query_vector: Precomputed query embedding, to avoid embedding the prompt twice.
+        :param filters: Metadata filters merged over the default ones.
+        :return: List of Documents, most relevant first.
+        """
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+        where = build_where({**self.filters, **(filters or {})})
+        query_vector = list(map(float, query_vector))
+        scored = self.vector_db.similarity_search_by_vector_with_relevance_scores(
+            query_vector, k=self.fetch_k, filter=where)
+        if self.score_threshold is not None:
+            scored = [(doc, distance) for doc, distance in scored
+                      if self.similarity(distance) >= self.score_threshold]
+        if not scored:
+            return []
+        if not self.use_mmr:
+            return [doc for doc, _ in scored[:self.k]]
+
+        # MMR orders the same neighbourhood; keep the documents that passed the cutoff in that order
+        relevant = {_doc_key(doc) for doc, _ in scored}
+        diverse = self.vector_db.max_marginal_relevance_search_by_vector(
+            query_vector, k=self.fetch_k, fetch_k=self.fetch_k, lambda_mult=self.lambda_mult, filter=where)
+        return [doc for doc in diverse if _doc_key(doc) in relevant][:self.k]
+
+    def format_context(self, docs):
+        """Join document texts, stopping at the context token budget."""
+        parts, used = [], 0
+        for doc in docs:
+            tokens = estimate_tokens(doc.page_content)
+            if used + tokens > self.max_context_tokens:
+                if not parts:
+                    # Keep at least the best document, cut to the budget
+                    parts.append(doc.page_content[:self.max_context_tokens * CHARS_PER_TOKEN])
+                break
+            parts.append(doc.page_content)
+            used += tokens
+        return "\n\n".join(parts)
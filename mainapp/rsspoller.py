@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+import requests
+
+from contentcache import content_hash
+from DBMS import ArticleInfoDB, normalize_published
+from processing import RSSFetcher
+
+
+class RSSPoller:
+    def __init__(self, fetcher=None, db=None, state_db="rss_state.db", min_interval=120, max_interval=3600,
+                 batch_size=100, seen_retention=90 * 24 * 3600):
+        """
+        Polls RSS feeds and writes only articles not seen before to ArticleInfoDB.
+        Each feed has its own interval: it halves when a poll finds new items and grows by half
+        (up to max_interval) when it does not.
+        :param fetcher: RSSFetcher whose RSS_FEEDS and engine are used.
+        :param db: ArticleInfoDB the new articles are written to.
+        :param state_db: SQLite file holding the seen GUIDs and per-feed poll state.
+        :param min_interval: Shortest time between two polls of a feed, in seconds.
+        :param max_interval: Longest time between two polls of a feed, in seconds.
+        :param batch_size: Articles written per transaction.
+        :param seen_retention: Seconds a GUID is remembered after it was first seen.
+        """
+        self.fetcher = fetcher or RSSFetcher()
+        self.db = db or ArticleInfoDB()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.batch_size = batch_size
+        self.seen_retention = seen_retention
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.connection = sqlite3.connect(state_db, check_same_thread=False)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS feeds (
+                url TEXT PRIMARY KEY,
+                interval REAL NOT NULL,
+                next_poll REAL NOT NULL,
+                digest TEXT
+            )
+            """
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS seen (
+                guid TEXT PRIMARY KEY,
+                feed TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_seen_at ON seen(seen_at)")
+        self.connection.commit()
+
+    def _feed_state(self, feed_url):
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT interval, next_poll, digest FROM feeds WHERE url = ?", (feed_url,)).fetchone()
+        return row or (self.min_interval, 0.0, None)
+
+    def _save_feed_state(self, feed_url, interval, digest):
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO feeds (url, interval, next_poll, digest) VALUES (?, ?, ?, ?)",
+                (feed_url, interval, time.time() + interval, digest)
+            )
+            self.connection.commit()
+
+    def _unseen(self, guids):
+        # Look the GUIDs up in chunks to stay under SQLite's parameter limit
+        seen = set()
+        with self._lock:
+            for start in range(0, len(guids), 500):
+                chunk = guids[start:start + 500]
+                seen.update(guid for guid, in self.connection.execute(
+                    f"SELECT guid FROM seen WHERE guid IN ({','.join('?' * len(chunk))})", chunk))
+        return [guid for guid in guids if guid not in seen]
+
+    def _mark_seen(self, feed_url, guids, seen_at):
+        with self._lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO seen (guid, feed, seen_at) VALUES (?, ?, ?)",
+                [(guid, feed_url, seen_at) for guid in guids]
+            )
+            self.connection.commit()
+
+    def _write(self, articles, seen_at):
+        # Items without a usable pubDate are dated by when they first appeared in the feed
+        first_seen = datetime.fromtimestamp(seen_at, timezone.utc)
+        rows = [(article["title"], normalize_published(article["pub_date"]) or first_seen,
+                 article["link"], article["description"]) for article in articles]
+        for start in range(0, len(rows), self.batch_size):
+            self.db.add_articles_bulk(rows[start:start + self.batch_size])
+
+    def poll_feed(self, feed_url):
+        """
+        Poll one feed now and store its new articles.
+        :return: The list of new article dictionaries (see RSSFetcher.parse_rss_articles()).
+        """
+        interval, _, digest = self._feed_state(feed_url)
+        try:
+            response = self.fetcher.engine.get(feed_url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error polling RSS feed {feed_url}: {e}")
+            self._save_feed_state(feed_url, min(self.max_interval, interval * 2), digest)
+            return []
+
+        # An unchanged document (cache hit, 304 or identical body) has nothing new to parse
+        new_digest = content_hash(response.content)
+        if new_digest == digest:
+            self._save_feed_state(feed_url, min(self.max_interval, interval * 1.5), digest)
+            return []
+
+        articles = {}
+        for article in self.fetcher.parse_rss_articles(response.content):
+            if article["link"] != "No Link":
+                articles.setdefault(article["guid"], article)
+        new_guids = self._unseen(list(articles))
+        new_articles = [articles[guid] for guid in new_guids]
+
+        # Written before being marked seen, so a failed write is retried on the next poll
+        seen_at = time.time()
+        self._write(new_articles, seen_at)
+        self._mark_seen(feed_url, new_guids, seen_at)
+        if new_articles:
+            interval = max(self.min_interval, interval / 2)
+        else:
+            interval = min(self.max_interval, interval * 1.5)
+        self._save_feed_state(feed_url, interval, new_digest)
+        return new_articles
+
+    def due_feeds(self, now=None):
+        """Return the feeds of RSS_FEEDS whose next poll time has passed."""
+        now = now or time.time()
+        return [feed_url for feed_url in self.fetcher.RSS_FEEDS if self._feed_state(feed_url)[1] <= now]
+
+    def poll_due(self):
+        """
+        Poll every due feed concurrently.
+        :return: A dictionary mapping each polled feed URL to its number of new articles.
+        """
+        feed_urls = self.due_feeds()
+        results = self.fetcher.engine.map(self.poll_feed, feed_urls)
+        return {feed_url: len(articles) for feed_url, articles in zip(feed_urls, results)}
+
+    def seconds_until_due(self):
+        """Time until the next feed is due, in seconds."""
+        next_polls = [self._feed_state(feed_url)[1] for feed_url in self.fetcher.RSS_FEEDS]
+        return max(0.0, min(next_polls, default=self.max_interval) - time.time())
+
+    def prune(self):
+        """Forget GUIDs seen more than seen_retention ago (feeds rarely list items that long)."""
+        with self._lock:
+            self.connection.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.seen_retention,))
+            self.connection.commit()
+
+    def run(self):
+        """Poll feeds as they become due until stop() is called."""
+        last_prune = 0.0
+        while not self._stop.is_set():
+            try:
+                self.poll_due()
+                if time.time() - last_prune > 24 * 3600:
+                    self.prune()
+                    last_prune = time.time()
+            except Exception as e:
+                print(f"Error polling RSS feeds: {e}")
+            self._stop.wait(max(1.0, self.seconds_until_due()))
+
+    def start(self):
+        """Run the poller in a background daemon thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="rss-poller", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the background thread after its current poll."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        """Stop polling and close the state database."""
+        self.stop()
+        self.connection.close()
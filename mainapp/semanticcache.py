@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy
+
+
+class SemanticCache:
+    def __init__(self, embeddings, threshold=0.92, ttl=6 * 3600, max_entries=500):
+        """
+        Cache of streamed LLM answers looked up by prompt similarity.
+        :param embeddings: LangChain embeddings object (e.g., OllamaEmbeddings) used to embed prompts.
+        :param threshold: Minimum cosine similarity for a stored prompt to count as a match.
+        :param ttl: Seconds an answer stays valid.
+        :param max_entries: Maximum number of stored answers; least recently used are dropped first.
+        """
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # id -> (scope, unit vector, chunks, stored_at)
+        self._ids = iter(range(1, 1 << 62))
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def scope_for(user_data, cv_key=None):
+        """
+        Build the scope answers are shared within: the user's job interest and location,
+        plus the CV the answer was personalised with, if any.
+        """
+        user_data = user_data or {}
+        return (
+            str(user_data.get("job_interest", "")).strip().lower(),
+            str(user_data.get("location", "")).strip().lower(),
+            cv_key or "",
+        )
+
+    def embed(self, prompt):
+        """Return the normalised embedding of a prompt."""
+        vector = numpy.asarray(self.embeddings.embed_query(prompt), dtype=numpy.float32)
+        norm = numpy.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, vector, scope):
+        """
+        Find the stored answer whose prompt is most similar to vector within scope.
+        :return: List of stored response chunks, or None if nothing is close enough.
+        """
+        now = time.time()
+        with self._lock:
+            for entry_id in [i for i, e in self._entries.items() if now - e[3] > self.ttl]:
+                del self._entries[entry_id]
+            candidates = [(entry_id, entry[1]) for entry_id, entry in self._entries.items() if entry[0] == scope]
+            if not candidates:
+                return None
+            similarities = numpy.stack([c[1] for c in candidates]) @ vector
+            best = int(numpy.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            entry_id = candidates[best][0]
+            self._entries.move_to_end(entry_id)
+            return list(self._entries[entry_id][2])
+
+    def store(self, vector, scope, chunks):
+        """Remember the streamed answer chunks for a prompt vector."""
+        with self._lock:
+            self._entries[next(self._ids)] = (scope, vector, list(chunks), time.time())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
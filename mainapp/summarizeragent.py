@@ -1,13 +1,111 @@
+import threading
+
+import numpy
 from sumy.summarizers.lsa import LsaSummarizer
 from sumy.nlp import tokenizers
 from sumy.parsers.plaintext import PlaintextParser
 
+
+def randomized_svd(matrix, rank, oversample=10, power_iterations=2, seed=0):
+    """
+    Approximate the top singular values/vectors of a matrix (Halko et al. range finder).
+    :param matrix: 2D numpy array.
+    :param rank: Number of singular values to keep.
+    :return: (u, sigma, v) truncated to rank, like numpy.linalg.svd(full_matrices=False).
+    """
+    rng = numpy.random.default_rng(seed)
+    k = min(rank + oversample, min(matrix.shape))
+    q, _ = numpy.linalg.qr(matrix @ rng.standard_normal((matrix.shape[1], k)))
+    for _ in range(power_iterations):
+        q, _ = numpy.linalg.qr(matrix.T @ q)
+        q, _ = numpy.linalg.qr(matrix @ q)
+    u_small, sigma, v = numpy.linalg.svd(q.T @ matrix, full_matrices=False)
+    return (q @ u_small)[:, :rank], sigma[:rank], v[:rank]
+
+
+class BoundedLsaSummarizer(LsaSummarizer):
+    def __init__(self, exact_svd_limit=150, max_rank=30):
+        """
+        LSA summarizer whose cost stays bounded on large documents.
+        :param exact_svd_limit: Largest matrix side (words or sentences) that still uses a full SVD.
+        :param max_rank: Number of topics kept by the randomized SVD for larger documents.
+        """
+        super().__init__()
+        self.exact_svd_limit = exact_svd_limit
+        self.max_rank = max_rank
+
+    def __call__(self, document, sentences_count):
+        self._ensure_dependecies_installed()
+
+        dictionary = self._create_dictionary(document)
+        if not dictionary:
+            return ()
+
+        matrix = self._create_matrix(document, dictionary)
+        matrix = self._compute_term_frequency(matrix)
+        if min(matrix.shape) > self.exact_svd_limit:
+            _u, sigma, v = randomized_svd(matrix, self.max_rank)
+        else:
+            _u, sigma, v = numpy.linalg.svd(matrix, full_matrices=False)
+
+        ranks = iter(self._compute_ranks(sigma, v))
+        return self._get_best_sentences(document.sentences, sentences_count, lambda s: next(ranks))
+
+    def _compute_term_frequency(self, matrix, smooth=0.4):
+        # Vectorised version of the per-cell loop in LsaSummarizer
+        max_word_frequencies = matrix.max(axis=0)
+        nonzero = max_word_frequencies != 0
+        matrix[:, nonzero] = smooth + (1.0 - smooth) * matrix[:, nonzero] / max_word_frequencies[nonzero]
+        return matrix
+
+
+class SummarizerEngine:
+    def __init__(self, language="english"):
+        """
+        Long-lived summarizer holding one tokenizer and one LSA summarizer for the whole process.
+        :param language: Tokenizer language.
+        """
+        self.tokenizer = tokenizers.Tokenizer(language)
+        self.agent = BoundedLsaSummarizer()
+
+    def sentences(self, doc, no_sentence):
+        """Return the best no_sentence sentences of doc as sumy Sentence objects."""
+        document = PlaintextParser.from_string(doc, self.tokenizer).document
+        if len(document.sentences) <= no_sentence:
+            return document.sentences
+        return self.agent(document, no_sentence)
+
+    def summarize(self, doc, no_sentence):
+        """
+        Summarize a text to at most no_sentence sentences.
+        Texts that are already short enough are returned unchanged.
+        """
+        document = PlaintextParser.from_string(doc, self.tokenizer).document
+        if len(document.sentences) <= no_sentence:
+            return doc.strip()
+        return " ".join(str(sentence) for sentence in self.agent(document, no_sentence))
+
+    def summarize_many(self, docs, no_sentence):
+        """Summarize several texts with the same engine, in order."""
+        return [self.summarize(doc, no_sentence) for doc in docs]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the process-wide SummarizerEngine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SummarizerEngine()
+        return _engine
+
+
 class summarizer:
     def __init__(self,doc):
-        self.toknizer = tokenizers
-        self.agent = LsaSummarizer()
+        self.engine = get_engine()
         self.doc = doc
     def run(self,no_sentence):
-        doc_pars = PlaintextParser.from_string(self.doc,self.toknizer.Tokenizer("english"))
-        summery = self.agent(doc_pars.document,no_sentence)
-        return summery
+        return self.engine.sentences(self.doc, no_sentence)
@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The app modules are imported flat, as when running from mainapp/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fetcher import FetchEngine
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Routes:
+    /flaky/<name>/<failures>  503 for the first <failures> requests of <name>, then 200.
+    /retry-after/<name>/<value>  503 with Retry-After: <value> ("date" means two seconds from now) once, then 200.
+    /slow/<seconds>/<body>  200 with <body> after <seconds>.
+    /ok  200.
+    """
+    hits = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        route = parts[0]
+        if route in ("flaky", "retry-after"):
+            with self.lock:
+                count = self.hits.get(self.path, 0)
+                self.hits[self.path] = count + 1
+            if route == "flaky" and count < int(parts[2]):
+                return self._reply(503)
+            if route == "retry-after" and count == 0:
+                value = formatdate(time.time() + 2, usegmt=True) if parts[2] == "date" else parts[2]
+                return self._reply(503, {"Retry-After": value})
+            return self._reply(200, body=str(count + 1))
+        if route == "slow":
+            time.sleep(float(parts[1]))
+            return self._reply(200, body=parts[2])
+        return self._reply(200)
+
+    do_POST = do_GET
+
+    def _reply(self, status, headers=None, body=""):
+        data = body.encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine():
+    engine = FetchEngine(max_workers=4, retries=3, backoff_factor=0.05)
+    yield engine
+    engine.close()
+
+
+def test_retries_with_exponential_backoff(base_url, engine):
+    start = time.monotonic()
+    response = engine.get(f"{base_url}/flaky/backoff/2")
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 200
+    assert response.text == "3"  # Two failures, then the third attempt succeeded
+    assert elapsed >= 0.05 + 0.1
+
+
+def test_gives_up_after_the_last_retry(base_url, engine):
+    response = engine.get(f"{base_url}/flaky/exhausted/10")
+
+    assert response.status_code == 503
+    assert StubHandler.hits["/flaky/exhausted/10"] == engine.retries + 1
+
+
+def test_post_is_not_retried(base_url, engine):
+    response = engine.post(f"{base_url}/flaky/post/1")
+
+    assert response.status_code == 503
+    assert StubHandler.hits["/flaky/post/1"] == 1
+
+
+def test_waits_for_retry_after_seconds(base_url, engine):
+    start = time.monotonic()
+    response = engine.get(f"{base_url}/retry-after/seconds/1")
+
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 1
+
+
+def test_waits_for_retry_after_date(base_url, engine):
+    start = time.monotonic()
+    response = engine.get(f"{base_url}/retry-after/date/date")
+
+    assert response.status_code == 200
+    assert time.monotonic() - start >= 1  # HTTP dates have whole seconds, so at least one of the two is left
+    assert StubHandler.hits["/retry-after/date/date"] == 2
+
+
+def test_gives_up_when_retry_after_exceeds_max_backoff(base_url):
+    engine = FetchEngine(max_backoff=5)
+    start = time.monotonic()
+    response = engine.get(f"{base_url}/retry-after/long/3600")
+    engine.close()
+
+    assert response.status_code == 503
+    assert time.monotonic() - start < 1
+    assert StubHandler.hits["/retry-after/long/3600"] == 1
+
+
+def test_per_host_rate_limit(base_url):
+    host = base_url.split("//")[1]
+    engine = FetchEngine(max_workers=4, host_rates={host: 20})
+    start = time.monotonic()
+    responses = engine.map(lambda _: engine.get(f"{base_url}/ok"), range(5))
+    elapsed = time.monotonic() - start
+    engine.close()
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert elapsed >= 4 / 20  # One request at once, then one every 1/20 s
+
+
+def test_map_keeps_the_order_of_items(base_url, engine):
+    # Earlier items take longer, so they finish last
+    delays = [0.3, 0.2, 0.1, 0.0]
+    bodies = engine.map(lambda delay: engine.get(f"{base_url}/slow/{delay}/{delay}").text, delays)
+
+    assert bodies == [str(delay) for delay in delays]